@@ -45,6 +45,11 @@ async def startup_event():
     asyncio.create_task(guardian.start_monitoring())
     logger.info("Guardian Initialized")
 
+    # Warm Gmail auth (Keychain read + credential decrypt) before the first request needs it
+    import threading
+    from haitham_voice_agent.tools.gmail.auth.oauth_flow import get_oauth_flow
+    threading.Thread(target=get_oauth_flow, name="hva-oauth-preload", daemon=True).start()
+
 
 
 @app.get("/health")
@@ -4,6 +4,14 @@ from typing import List, Optional
 import logging
 from pathlib import Path
 
+# Trees can hold thousands of nodes: serialize them directly (orjson when installed)
+# instead of letting FastAPI walk every node through jsonable_encoder first
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as TreeResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as TreeResponse
+
 from haitham_voice_agent.tools.memory.voice_tools import VoiceMemoryTools
 from haitham_voice_agent.tools.projects import project_manager
 
@@ -109,7 +117,7 @@ async def get_file_tree(path: str = "~", depth: int = 2):
     """Get file system tree structure"""
     from haitham_voice_agent.tools.files import FileTools
     ft = FileTools()
-    return await ft.get_file_tree(path, depth)
+    return TreeResponse(await ft.get_file_tree(path, depth))
 
 class OpenFileRequest(BaseModel):
     path: str
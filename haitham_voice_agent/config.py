@@ -268,6 +268,9 @@ class Config:
     DRAFTS_CACHE_TTL: int = 60   # 1 minute
     SUMMARY_CACHE_TTL: int = 1800  # 30 minutes
     
+    # Max entries kept in the Gmail API response cache (least recently used go first)
+    GMAIL_CACHE_MAX: int = 2048
+    
     # ==================== GMAIL SETTINGS ====================
     # Gmail API scopes
     GMAIL_SCOPES = [
@@ -289,6 +292,9 @@ class Config:
     # Gmail API rate limiting (requests per second)
     GMAIL_API_RATE_LIMIT: int = 10
     
+    # Gmail API requests allowed in flight at once
+    GMAIL_MAX_CONCURRENT: int = 5
+    
     # IMAP/SMTP settings (fallback)
     IMAP_SERVER: str = "imap.gmail.com"
     IMAP_PORT: int = 993
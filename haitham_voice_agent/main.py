@@ -951,7 +951,8 @@ Output format: JSON
             directory = self._resolve_path(params.get("directory", "~"))
             
             if action == "list_files":
-                res = await self.file_tools.list_files(directory)
+                # Only names of the first few entries are spoken: skip per-file stats and the full sort
+                res = await self.file_tools.list_files(directory, full_sort=False, details=False)
                 if res.get("error"):
                     return {"success": False, "message": res["message"]}
                 
@@ -5,6 +5,7 @@ Test Basic Tools
 import pytest
 import asyncio
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 from haitham_voice_agent.tools.files import FileTools
 from haitham_voice_agent.tools.docs import DocTools
 from haitham_voice_agent.tools.browser import BrowserTools
@@ -35,6 +36,25 @@ def terminal_tools():
     return TerminalTools()
 
 
+@pytest.fixture
+def sandbox_tools(tmp_path, monkeypatch):
+    """FileTools whose home sandbox is tmp_path"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return FileTools()
+
+
+def _make_files(root, *relative_paths):
+    """Create small files (and their parents) under root"""
+    for rel in relative_paths:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text("x")
+
+
+def _relative(root, infos):
+    """Sorted root-relative paths of file info dicts"""
+    return sorted(Path(info["path"]).relative_to(root).as_posix() for info in infos)
+
+
 # ==================== File Tools Tests ====================
 
 @pytest.mark.asyncio
@@ -92,6 +112,155 @@ async def test_copy_file(file_tools, tmp_path):
     assert dest.read_text() == "test content"
 
 
+@pytest.mark.asyncio
+async def test_search_files_slash_pattern(sandbox_tools, tmp_path):
+    """Slash patterns match at any depth, but '*' never crosses a '/'"""
+    _make_files(tmp_path, "sub/x.py", "sub/deep/z.py", "a/sub/y.py")
+    
+    result = await sandbox_tools.search_files(str(tmp_path), "sub/*.py")
+    
+    assert not result.get("error")
+    assert _relative(tmp_path, result["matches"]) == ["a/sub/y.py", "sub/x.py"]
+
+
+@pytest.mark.asyncio
+async def test_list_files_slash_patterns_non_recursive(sandbox_tools, tmp_path):
+    """Non-recursive patterns are anchored at the directory, like Path.glob"""
+    _make_files(tmp_path, "top.py", "sub/x.py", "sub/deep/z.py", "a/sub/y.py")
+    
+    result = await sandbox_tools.list_files(str(tmp_path), pattern="**/*.py")
+    assert result["count"] == 4
+    
+    result = await sandbox_tools.list_files(str(tmp_path), pattern="sub/*.py")
+    assert _relative(tmp_path, result["files"]) == ["sub/x.py"]
+
+
+@pytest.mark.asyncio
+async def test_search_files_content_non_ascii_case(sandbox_tools, tmp_path):
+    """Content search ignores case for non-ASCII letters too"""
+    (tmp_path / "cv.txt").write_text("My RÉSUMÉ", encoding="utf-8")
+    (tmp_path / "other.txt").write_text("nothing here")
+    
+    result = await sandbox_tools.search_files(str(tmp_path), "*.txt", content_pattern="résumé")
+    
+    assert not result.get("error")
+    assert _relative(tmp_path, result["matches"]) == ["cv.txt"]
+
+
+@pytest.mark.asyncio
+async def test_file_tree_depth_limit_keeps_files(sandbox_tools, tmp_path):
+    """Directories past the depth limit don't use up the per-directory cap"""
+    for i in range(600):
+        (tmp_path / f"dir{i:03}").mkdir()
+    _make_files(tmp_path, *[f"file{i:02}.txt" for i in range(50)])
+
+    result = await sandbox_tools.get_file_tree(str(tmp_path), depth=0)
+
+    children = result["tree"]["children"]
+    assert len(children) == 50
+    assert all(child["type"] == "file" for child in children)
+
+
+# ==================== Gmail API Handler Tests ====================
+
+def _gmail_message(message_id):
+    """Minimal Gmail API message resource"""
+    return {
+        "id": message_id,
+        "threadId": f"t_{message_id}",
+        "labelIds": ["INBOX"],
+        "snippet": "hello",
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [{"name": "Subject", "value": f"Subject {message_id}"}],
+            "body": {"data": ""}
+        }
+    }
+
+
+class _FakeBatch:
+    """Stand-in for a googleapiclient BatchHttpRequest"""
+    
+    def __init__(self, callback, error=None, failing_ids=()):
+        self.callback = callback
+        self.error = error
+        self.failing_ids = failing_ids
+        self.ids = []
+    
+    def add(self, request, request_id=None):
+        self.ids.append(request_id)
+    
+    def execute(self, http=None):
+        if self.error:
+            raise self.error
+        for message_id in self.ids:
+            if message_id in self.failing_ids:
+                self.callback(message_id, None, RuntimeError("not found"))
+            else:
+                self.callback(message_id, _gmail_message(message_id), None)
+
+
+@pytest.fixture
+def gmail_handler():
+    """GmailAPIHandler on a mocked Gmail service"""
+    from haitham_voice_agent.tools.gmail.gmail_api_handler import GmailAPIHandler
+    
+    with patch("haitham_voice_agent.tools.gmail.gmail_api_handler.get_oauth_flow"):
+        handler = GmailAPIHandler()
+    handler.service = MagicMock()
+    handler._thread_http = lambda: None
+    
+    users = handler.service.users.return_value
+    users.getProfile.return_value.execute.return_value = {"historyId": "1"}
+    users.messages.return_value.list.return_value.execute.return_value = {
+        "messages": [{"id": "m1"}, {"id": "m2"}]
+    }
+    users.labels.return_value.list.return_value.execute.return_value = {
+        "labels": [{"id": "Label_1", "name": "Work", "type": "user"}]
+    }
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_gmail_failed_batch_not_cached(gmail_handler):
+    """A batch that fails as a whole is reported, not cached as a short list"""
+    gmail_handler.service.new_batch_http_request.side_effect = (
+        lambda callback: _FakeBatch(callback, error=RuntimeError("rate limited"))
+    )
+    
+    result = await gmail_handler.fetch_latest_email(limit=2)
+    
+    assert result.get("error")
+    assert "latest_2_full" not in gmail_handler.cache
+
+
+@pytest.mark.asyncio
+async def test_gmail_apply_label_after_index_eviction(gmail_handler):
+    """A label index evicted while the labels are still cached is rebuilt"""
+    result = await gmail_handler.apply_label("m1", "work")
+    assert result["status"] == "label_applied"
+    
+    gmail_handler.cache.pop("label_index")
+    result = await gmail_handler.apply_label("m1", "Work")
+    
+    assert result["status"] == "label_applied"
+    labels_list = gmail_handler.service.users.return_value.labels.return_value.list.return_value
+    assert labels_list.execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_gmail_partial_batch_not_revalidated(gmail_handler):
+    """A result missing messages is never kept alive by the history check"""
+    gmail_handler.service.new_batch_http_request.side_effect = (
+        lambda callback: _FakeBatch(callback, failing_ids=("m2",))
+    )
+    
+    result = await gmail_handler.fetch_latest_email(limit=2)
+    
+    assert result["count"] == 1
+    assert "latest_2_full" not in gmail_handler._history_ids
+
+
 # ==================== Terminal Tools Tests ====================
 
 @pytest.mark.asyncio
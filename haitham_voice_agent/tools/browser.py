@@ -5,14 +5,39 @@ Simple browser operations for HVA.
 Implements operations from Master SRS Section 3.6.
 """
 
-import os
+import sys
 import logging
+import subprocess
 import urllib.parse
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
 
+def _launch(target: str) -> None:
+    """
+    Hand a URL to the system opener without a shell.
+    Fire-and-forget: the child is not awaited.
+    """
+    if sys.platform == "darwin":
+        cmd = ["open", target]
+    elif sys.platform.startswith("win"):
+        cmd = ["explorer", target]
+    else:
+        cmd = ["xdg-open", target]
+    
+    try:
+        subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+    except OSError as e:
+        # Same outcome as the old os.system call: log, don't fail the tool
+        logger.warning(f"Could not launch {cmd[0]}: {e}")
+
+
 class BrowserTools:
     """Browser operations"""
     
@@ -34,8 +59,8 @@ class BrowserTools:
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
-            # Open in default browser (macOS)
-            os.system(f'open "{url}"')
+            # Open in default browser
+            _launch(url)
             
             logger.info(f"Opened URL: {url}")
             
@@ -67,7 +92,7 @@ class BrowserTools:
             url = f"https://www.google.com/search?q={encoded_query}"
             
             # Open in browser
-            os.system(f'open "{url}"')
+            _launch(url)
             
             logger.info(f"Searched Google for: {query}")
             
@@ -1,5 +1,8 @@
 import os
+import mmap
 import shutil
+import asyncio
+import hashlib
 import logging
 import json
 from pathlib import Path
@@ -11,6 +14,23 @@ from haitham_voice_agent.llm_router import get_router
 
 logger = logging.getLogger(__name__)
 
+# Below this size mmap setup costs more than the chunked read it replaces
+MMAP_HASH_THRESHOLD = 1 << 20
+
+
+def _md5_file(path: Path) -> str:
+    """MD5 of a file; large files are mapped and hashed in one C call"""
+    hasher = hashlib.md5()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_HASH_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hasher.update(mm)
+        else:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+
 class DeepOrganizer:
     """
     Deep Documents Organizer
@@ -589,6 +609,20 @@ class DeepOrganizer:
             }
         return None
 
+    async def _indexed_hash(self, memory_system, path: Path, st: os.stat_result) -> Optional[str]:
+        """Hash from the file index for path, if the file wasn't modified after indexing"""
+        try:
+            entry = await memory_system.sqlite_store.get_file_index(str(path))
+            if not entry or not entry.get("file_hash") or not entry.get("last_modified"):
+                return None
+            
+            indexed_at = datetime.fromisoformat(entry["last_modified"]).timestamp()
+            if st.st_mtime <= indexed_at:
+                return entry["file_hash"]
+        except Exception as e:
+            logger.debug(f"Indexed hash lookup failed for {path}: {e}")
+        return None
+
     async def execute_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the approved plan"""
         logger.info("Executing Deep Organizer Plan...")
@@ -639,8 +673,13 @@ class DeepOrganizer:
                 if dst.exists():
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     dst = dst.parent / f"{dst.stem}_{timestamp}{dst.suffix}"
-                    
-                shutil.move(str(src), str(dst))
+                
+                # Remember the source identity to detect a plain rename afterwards
+                src_stat = src.stat()
+                
+                # Moves stay sequential so the duplicate check above can't race,
+                # but each one runs off the event loop
+                await asyncio.to_thread(shutil.move, str(src), str(dst))
                 report["success"] += 1
                 
                 # Log operation
@@ -669,15 +708,16 @@ class DeepOrganizer:
                         except:
                             pass
                     
+                    # Same inode after the move means no bytes were copied;
+                    # reuse the indexed hash if the file hasn't changed since
+                    new_file_hash = None
+                    dst_stat = dst.stat()
+                    if (dst_stat.st_dev, dst_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+                        new_file_hash = await self._indexed_hash(memory_tools.memory_system, src, src_stat)
+                    
                     # Calculate hash for the new file
-                    import hashlib
-                    hasher = hashlib.md5()
-                    with open(dst, 'rb') as f:
-                        buf = f.read(65536)
-                        while len(buf) > 0:
-                            hasher.update(buf)
-                            buf = f.read(65536)
-                    new_file_hash = hasher.hexdigest()
+                    if not new_file_hash:
+                        new_file_hash = await asyncio.to_thread(_md5_file, dst)
 
                     await memory_tools.memory_system.index_file(
                         path=str(dst),
@@ -5,15 +5,85 @@ Document operations using Gemini for analysis.
 Implements operations from Master SRS Section 3.5.
 """
 
+import os
+import mmap
+import asyncio
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-import PyPDF2
+from typing import Dict, Any, Optional, List, Iterator
 
 from ..llm_router import get_router
 
 logger = logging.getLogger(__name__)
 
+# Document parsers are imported on first use, not when the tools load
+_fitz = None
+_pypdf2 = None
+_docx = None
+_token_encoder = None
+
+# Per-document token budget for prompts that embed two documents
+COMPARE_TOKENS_PER_DOC = 4000
+
+
+def _get_fitz():
+    """PyMuPDF (much faster text extraction than PyPDF2), or None if not installed"""
+    global _fitz
+    if _fitz is None:
+        try:
+            import fitz
+            _fitz = fitz
+        except ImportError:
+            _fitz = False
+    return _fitz or None
+
+
+def _get_pypdf2():
+    """PyPDF2 module (loaded once)"""
+    global _pypdf2
+    if _pypdf2 is None:
+        import PyPDF2
+        _pypdf2 = PyPDF2
+    return _pypdf2
+
+
+def _head_tokens(text: str, max_tokens: int) -> str:
+    """
+    Return the head of text that fits in max_tokens.
+    Uses tiktoken when installed; otherwise the ~4 chars/token estimate
+    used elsewhere in HVA, cut back to the last whitespace.
+    """
+    global _token_encoder
+    if _token_encoder is None:
+        try:
+            import tiktoken
+            _token_encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _token_encoder = False
+    
+    if _token_encoder:
+        tokens = _token_encoder.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return _token_encoder.decode(tokens[:max_tokens])
+    
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars]
+    cut = head.rfind(" ")
+    return head[:cut] if cut > max_chars // 2 else head
+
+
+def _get_docx():
+    """python-docx module (loaded once)"""
+    global _docx
+    if _docx is None:
+        import docx
+        _docx = docx
+    return _docx
+
 
 class DocTools:
     """Document processing tools using Gemini"""
@@ -165,10 +235,10 @@ Compare the following two documents and provide:
 3. Overall assessment
 
 Document 1:
-{text1[:2000]}
+{_head_tokens(text1, COMPARE_TOKENS_PER_DOC)}
 
 Document 2:
-{text2[:2000]}
+{_head_tokens(text2, COMPARE_TOKENS_PER_DOC)}
 """
             
             comparison_result = await self.router.generate_with_gemini(prompt, temperature=0.5)
@@ -269,8 +339,8 @@ Format as a structured list.
                     "message": "File is not a PDF"
                 }
             
-            # Extract text from PDF
-            text = self._extract_pdf_text(path, page_range)
+            # Extract text from PDF (CPU-bound, keep it off the event loop)
+            text = await asyncio.to_thread(self._extract_pdf_text, path, page_range)
             
             logger.info(f"Read PDF: {file_path}")
             
@@ -288,64 +358,100 @@ Format as a structured list.
             }
     
     async def _extract_text(self, file_path: Path) -> str:
-        """Extract text from various file types"""
-        suffix = file_path.suffix.lower()
-        
-        if suffix == '.pdf':
-            return self._extract_pdf_text(file_path)
-        elif suffix == '.txt' or suffix == '.md':
-            return file_path.read_text(encoding='utf-8')
-        elif suffix == '.docx':
-            return self._extract_docx_text(file_path)
+        """
+        Extract text from various file types.
+        Results are cached per (path, mtime, size), so summarize → translate
+        on the same file parses it only once.
+        """
+        stat = file_path.stat()
+        return await asyncio.to_thread(
+            _extract_text_cached,
+            str(file_path),
+            stat.st_mtime_ns,
+            stat.st_size,
+            file_path.suffix.lower()
+        )
+    
+    @staticmethod
+    def _page_indices(page_range: Optional[str], page_count: int) -> List[int]:
+        """Convert a page range ("1-5", "3", "all") to zero-based page indices"""
+        if page_range and page_range != "all":
+            # Parse range (e.g., "1-5")
+            if '-' in page_range:
+                start, end = map(int, page_range.split('-'))
+                pages = range(start - 1, min(end, page_count))
+            else:
+                pages = [int(page_range) - 1]
         else:
-            # Try to read as text
-            try:
-                return file_path.read_text(encoding='utf-8')
-            except:
-                return ""
+            pages = range(page_count)
+        
+        return [page_num for page_num in pages if 0 <= page_num < page_count]
+    
+    @staticmethod
+    def _iter_pdf_pages(file_path: Path, page_range: Optional[str] = None) -> Iterator[str]:
+        """Yield the text of each selected PDF page (PyMuPDF when available, PyPDF2 otherwise)"""
+        fitz = _get_fitz()
+        
+        if fitz:
+            with fitz.open(str(file_path)) as doc:
+                for page_num in DocTools._page_indices(page_range, doc.page_count):
+                    yield doc[page_num].get_text()
+            return
+        
+        # Let the page cache back PyPDF2's random access instead of Python buffering
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            if page_range and page_range != "all" and hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                reader = _get_pypdf2().PdfReader(mm)
+                pages = reader.pages
+                for page_num in DocTools._page_indices(page_range, len(pages)):
+                    yield pages[page_num].extract_text()
+        finally:
+            os.close(fd)
     
-    def _extract_pdf_text(self, file_path: Path, page_range: Optional[str] = None) -> str:
+    @staticmethod
+    def _extract_pdf_text(file_path: Path, page_range: Optional[str] = None) -> str:
         """Extract text from PDF"""
         try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = []
-                
-                # Determine pages to extract
-                if page_range and page_range != "all":
-                    # Parse range (e.g., "1-5")
-                    if '-' in page_range:
-                        start, end = map(int, page_range.split('-'))
-                        pages = range(start - 1, min(end, len(reader.pages)))
-                    else:
-                        page_num = int(page_range) - 1
-                        pages = [page_num]
-                else:
-                    pages = range(len(reader.pages))
-                
-                # Extract text from pages
-                for page_num in pages:
-                    if page_num < len(reader.pages):
-                        page = reader.pages[page_num]
-                        text.append(page.extract_text())
-                
-                return '\n\n'.join(text)
+            return '\n\n'.join(DocTools._iter_pdf_pages(file_path, page_range))
                 
         except Exception as e:
             logger.error(f"PDF extraction failed: {e}")
             return ""
     
-    def _extract_docx_text(self, file_path: Path) -> str:
+    @staticmethod
+    def _extract_docx_text(file_path: Path) -> str:
         """Extract text from DOCX"""
         try:
-            import docx
-            doc = docx.Document(file_path)
+            doc = _get_docx().Document(file_path)
             return '\n\n'.join([para.text for para in doc.paragraphs])
         except Exception as e:
             logger.error(f"DOCX extraction failed: {e}")
             return ""
 
 
+@lru_cache(maxsize=64)
+def _extract_text_cached(path_str: str, mtime_ns: int, size: int, suffix: str) -> str:
+    """Extract text once per file version; mtime/size in the key handle invalidation"""
+    file_path = Path(path_str)
+    
+    if suffix == '.pdf':
+        return DocTools._extract_pdf_text(file_path)
+    elif suffix == '.txt' or suffix == '.md':
+        # Single C-level decode; bad bytes are replaced rather than failing the read
+        return file_path.read_bytes().decode('utf-8', errors='replace')
+    elif suffix == '.docx':
+        return DocTools._extract_docx_text(file_path)
+    else:
+        # Try to read as text (strict, so binary files still yield nothing)
+        try:
+            return file_path.read_bytes().decode('utf-8')
+        except:
+            return ""
+
+
 if __name__ == "__main__":
     # Test doc tools
     import asyncio
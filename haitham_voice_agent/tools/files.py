@@ -9,25 +9,468 @@ Implements "Smart User Sandbox":
 """
 
 import os
+import re
+import errno
+import json
+import stat
+import asyncio
 import shutil
+import subprocess
+import heapq
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Union
 import getpass
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
+# Resolve the login name once; getpass walks env vars and pwd on every call
+try:
+    _USER_LC = getpass.getuser().lower()
+except Exception:
+    _USER_LC = "haitham"
+
+# Inputs that always mean the user's home directory
+_HOME_ALIASES = frozenset({"~", "home", "هيثم", "haitham", _USER_LC})
+
+# Where a bare relative name is looked for when it doesn't resolve as given
+_SMART_SEARCH_FOLDERS = ("Documents", "Downloads", "Desktop")
+
+# Folder names the user says casually (case/plural variations) -> real home folder
+_COMMON_FOLDERS = {
+    "download": "Downloads", "downloads": "Downloads",
+    "document": "Documents", "documents": "Documents",
+    "desktop": "Desktop",
+    "picture": "Pictures", "pictures": "Pictures",
+    "movie": "Movies", "movies": "Movies",
+    "music": "Music",
+    "public": "Public"
+}
+
+
+# Units for _format_size, one per power of 1024
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# Content search: only the head of each file is scanned
+_CONTENT_SCAN_LIMIT = 100000
+_CONTENT_SCAN_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+_CONTENT_SCAN_TIMEOUT = 30
+
+# Sensitive directories/files to block explicitly
+_BLACKLIST_DIRS = frozenset({
+    '.ssh', '.aws', '.kube', 'Library', 'Applications', 
+    '.bashrc', '.zshrc', '.profile', '.env'
+})
+
+# Directories recursive walks don't descend into (hidden ones are skipped too);
+# blacklisted trees are pruned here rather than filtered entry by entry
+_PRUNE_DIRS = _BLACKLIST_DIRS | {'node_modules', '__pycache__', 'venv', 'site-packages'}
+
+# list_files shows this many entries; only they need to be in sorted order
+_LIST_DISPLAY_LIMIT = 10
+
+# Background reader for recursive walks (scandir releases the GIL while reading)
+_SCANDIR_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hva-scandir")
+
+# Recent directory reads reused by list_files/get_file_tree while the
+# directory's mtime is unchanged. Entries keep the stat of their first read,
+# so a cached read is also dropped after _DIR_CACHE_TTL seconds.
+_DIR_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_DIR_CACHE_LOCK = threading.Lock()
+_DIR_CACHE_SIZE = 64
+_DIR_CACHE_TTL = 30
+
+# Binary formats that can never match a text content search
+_BINARY_EXTENSIONS = frozenset({
+    '.zip', '.gz', '.tar', '.rar', '.7z', '.dmg', '.iso', '.pkg',
+    '.png', '.jpg', '.jpeg', '.gif', '.heic', '.webp', '.bmp', '.ico',
+    '.mp3', '.mp4', '.mov', '.m4a', '.wav', '.avi', '.mkv',
+    '.exe', '.dll', '.so', '.dylib', '.bin', '.pyc'
+})
+
+
+def _entry_mtime(entry: os.DirEntry) -> float:
+    """Sort key: modification time from the DirEntry stat cache"""
+    try:
+        return entry.stat().st_mtime
+    except OSError:
+        return 0
+
+
+def _entry_size(entry: os.DirEntry) -> int:
+    """Sort key: file size from the DirEntry stat cache (directories count as 0)"""
+    try:
+        st = entry.stat()
+        return 0 if stat.S_ISDIR(st.st_mode) else st.st_size
+    except OSError:
+        return 0
+
+
+# Characters that make a glob pattern more than a literal name
+_GLOB_MAGIC = re.compile(r'[*?[]')
+
+# Runs of '**' segments that match the same thing as a single one
+_DOUBLE_STAR_RUN = re.compile(r'(?:\*\*/)+')
+_DOUBLE_STAR_TAIL = re.compile(r'(?:/\*\*)+$')
+
+
+def _suffix(name: str) -> str:
+    """Same result as Path(name).suffix, without building a Path"""
+    i = name.rfind('.')
+    return name[i:] if 0 < i < len(name) - 1 else ''
+
+
+def _normalize_pattern(pattern: Optional[str]) -> Optional[str]:
+    """Collapse repeated '**' segments ('**/**/*.log' -> '**/*.log')"""
+    if not pattern or "**" not in pattern:
+        return pattern
+    return _DOUBLE_STAR_TAIL.sub("/**", _DOUBLE_STAR_RUN.sub("**/", pattern))
+
+
+def _split_pattern(pattern: Optional[str]):
+    """
+    Split a glob into (literal_prefix, wildcard_tail) at the first segment
+    with a wildcard, e.g. 'Projects/HVA/*.py' -> ('Projects/HVA', '*.py').
+    """
+    if not pattern or "/" not in pattern:
+        return "", pattern
+    parts = pattern.split("/")
+    n = 0
+    while n < len(parts) - 1 and parts[n] not in ("", ".", "..") and not _GLOB_MAGIC.search(parts[n]):
+        n += 1
+    return "/".join(parts[:n]), "/".join(parts[n:])
+
+
+def _classify(path: Path):
+    """(exists, is_dir) from a single stat"""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return False, False
+    return True, stat.S_ISDIR(st.st_mode)
+
+
+def _tree_order(entry: os.DirEntry):
+    """get_file_tree order: directories first, then case-insensitive name"""
+    return (not entry.is_dir(), entry.name.lower())
+
+
+def _translate_segment(segment: str) -> str:
+    """fnmatch-style translation of one path segment; wildcards never match '/'"""
+    i, n = 0, len(segment)
+    out = []
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == '*':
+            if not out or out[-1] != '[^/]*':
+                out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = i
+            if j < n and segment[j] == '!':
+                j += 1
+            if j < n and segment[j] == ']':
+                j += 1
+            while j < n and segment[j] != ']':
+                j += 1
+            if j >= n:
+                out.append('\\[')
+            else:
+                chars = re.sub(r'([&~|\[])', r'\\\1', segment[i:j].replace('\\', '\\\\'))
+                i = j + 1
+                if chars[0] == '!':
+                    chars = '^' + chars[1:]
+                elif chars[0] == '^':
+                    chars = '\\' + chars
+                out.append(f'[{chars}]')
+        else:
+            out.append(re.escape(c))
+    return ''.join(out)
+
+
+def _compile_pattern(pattern: Optional[str], recursive: bool = False):
+    """
+    Compile a glob pattern into (regex, match_on_relative_path, max_depth),
+    matching like pathlib's glob/rglob: wildcards stay inside one segment,
+    a '**' segment spans any number of directories, and a recursive search
+    matches the pattern at any depth.
+    Patterns without a '/' are matched against the entry name only.
+    max_depth is how many directory levels the walk needs (None: no limit).
+    """
+    pattern = pattern or "*"
+    if recursive:
+        # rglob already puts '**/' in front of the pattern
+        while pattern.startswith("**/"):
+            pattern = pattern[3:]
+    
+    if "/" not in pattern and pattern != "**":
+        return re.compile(_translate_segment(pattern) + r'\Z', re.DOTALL), False, None if recursive else 1
+    
+    segments = pattern.split("/")
+    last = len(segments) - 1
+    parts = [r'(?:[^/]+/)*'] if recursive else []
+    for i, segment in enumerate(segments):
+        if segment == "**" and i == last:
+            # 'dir/**' is dir itself and everything below it
+            if parts and parts[-1].endswith('/'):
+                parts[-1] = parts[-1][:-1]
+                parts.append(r'(?:/.*)?')
+            else:
+                parts.append('.*')
+        elif segment == "**":
+            parts.append(r'(?:[^/]+/)*')
+        else:
+            parts.append(_translate_segment(segment) + ('' if i == last else '/'))
+    max_depth = None if recursive or "**" in segments else len(segments)
+    return re.compile(''.join(parts) + r'\Z', re.DOTALL), True, max_depth
+
+
+def _get_launch_services():
+    """pyobjc LaunchServices/CoreFoundation calls (loaded once), or None if not installed"""
+    global _launch_services
+    if _launch_services is None:
+        try:
+            from LaunchServices import LSOpenCFURLRef
+            from CoreFoundation import CFURLCreateWithFileSystemPath, kCFURLPOSIXPathStyle
+            _launch_services = (LSOpenCFURLRef, CFURLCreateWithFileSystemPath, kCFURLPOSIXPathStyle)
+        except ImportError:
+            _launch_services = False
+    return _launch_services or None
+
+
+def _open_with_default_app(path: str, is_dir: bool) -> None:
+    """Open path like Finder would, without spawning /usr/bin/open when pyobjc is present"""
+    launch_services = _get_launch_services()
+    if launch_services:
+        open_url, create_url, posix_style = launch_services
+        url = create_url(None, path, posix_style, is_dir)
+        result = open_url(url, None)
+        status = result[0] if isinstance(result, tuple) else result
+        if status == 0:
+            return
+        logger.warning(f"LSOpenCFURLRef failed ({status}), falling back to 'open'")
+    
+    subprocess.run(['open', path], check=True)
+
+
+def _read_dir(path: str) -> List[os.DirEntry]:
+    """All entries of one directory ([] if it can't be read)"""
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def _read_dir_cached(path: str) -> List[os.DirEntry]:
+    """_read_dir, reusing the previous read while (path, mtime_ns) is unchanged"""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return []
+    
+    now = time.monotonic()
+    with _DIR_CACHE_LOCK:
+        hit = _DIR_CACHE.get(path)
+        if hit and hit[0] == mtime_ns and now - hit[1] < _DIR_CACHE_TTL:
+            _DIR_CACHE.move_to_end(path)
+            return list(hit[2])
+    
+    entries = _read_dir(path)
+    with _DIR_CACHE_LOCK:
+        _DIR_CACHE[path] = (mtime_ns, now, entries)
+        _DIR_CACHE.move_to_end(path)
+        while len(_DIR_CACHE) > _DIR_CACHE_SIZE:
+            _DIR_CACHE.popitem(last=False)
+    return list(entries)
+
+
+def _forget_paths() -> None:
+    """Drop cached directory reads after a file operation"""
+    with _DIR_CACHE_LOCK:
+        _DIR_CACHE.clear()
+
+
+def _reserve_unique_path(dest: Path) -> Path:
+    """
+    Claim the first free '<stem>_<n><suffix>' next to dest.
+    Taken numbers are found by doubling and then bisecting, so N existing
+    copies cost ~2*log2(N) probes; the final name is created with O_EXCL so
+    nothing else can take it between the check and the move.
+    """
+    base, suffix = dest.stem, dest.suffix
+    
+    def candidate(n: int) -> Path:
+        return dest.with_name(f"{base}_{n}{suffix}")
+    
+    # lo is known taken (0 stands for dest itself), hi is the first free probe
+    lo, hi = 0, 1
+    while os.path.lexists(candidate(hi)):
+        lo, hi = hi, hi * 2
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if os.path.lexists(candidate(mid)):
+            lo = mid
+        else:
+            hi = mid
+    
+    n = hi
+    while True:
+        try:
+            os.close(os.open(candidate(n), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            return candidate(n)
+        except FileExistsError:
+            n += 1
+
+
+def _move_path(src: str, dst: str) -> None:
+    """
+    Single rename(2) when source and destination share a filesystem;
+    shutil.move (with its copy fallback) only when the kernel says EXDEV.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
+# Fixed fields of the confirmation_required responses (message/params added per call)
+_CONFIRM_DELETE_FOLDER = {"status": "confirmation_required", "command": "delete_folder", "risk_level": "high"}
+_CONFIRM_DELETE_FILE = {"status": "confirmation_required", "command": "files.delete_file", "risk_level": "high"}
+_CONFIRM_MOVE_FILE = {"status": "confirmation_required", "command": "files.move_file", "risk_level": "medium"}
+_CONFIRM_MOVE_ALL_FILES = {"status": "confirmation_required", "command": "files.move_all_files", "risk_level": "high"}
+
+# organize_documents instruction keywords (English, case-insensitive, and Arabic)
+_FLATTEN_RE = re.compile(r'direct|flatten|مباشر|بدون مجلدات|الغي المجلدات|إلغاء المجلدات', re.IGNORECASE)
+_DATE_RE = re.compile(r'date|تاريخ', re.IGNORECASE)
+
+# Last organization plan, kept until the user confirms it
+_PLAN_CACHE_FILE = Path("/tmp/hva_last_plan.json")
+
+
+def _save_plan(plan: Dict[str, Any]) -> None:
+    """Write the pending plan to the cache file"""
+    if HAS_ORJSON:
+        _PLAN_CACHE_FILE.write_bytes(orjson.dumps(plan, option=orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(_PLAN_CACHE_FILE, 'w') as f:
+            json.dump(plan, f)
+
+
+def _load_plan() -> Dict[str, Any]:
+    """Read the pending plan back from the cache file"""
+    if HAS_ORJSON:
+        return orjson.loads(_PLAN_CACHE_FILE.read_bytes())
+    with open(_PLAN_CACHE_FILE, 'r') as f:
+        return json.load(f)
+
+
+# Parts of the (resolved) workspace projects root, looked up on first move
+_projects_root_parts = None
+
+
+def _get_projects_root_parts() -> tuple:
+    """Path parts of the workspace projects root, for prefix tests on moved files"""
+    global _projects_root_parts
+    if _projects_root_parts is None:
+        from haitham_voice_agent.tools.workspace_manager import workspace_manager
+        _projects_root_parts = workspace_manager.projects_root.resolve().parts
+    return _projects_root_parts
+
+
+# LaunchServices entry points for open_file, resolved on first use
+_launch_services = None
+
+# Memory tools for indexing moved files, created and initialized on first use
+_memory_tools = None
+
+# Move events waiting to be indexed, drained in order by one background worker
+_memory_queue: Optional[asyncio.Queue] = None
+_memory_worker_task: Optional[asyncio.Task] = None
+_MEMORY_QUEUE_SIZE = 256
+
+
+async def _get_memory_tools():
+    """Shared, initialized VoiceMemoryTools instance"""
+    global _memory_tools
+    if _memory_tools is None:
+        from haitham_voice_agent.tools.memory.voice_tools import VoiceMemoryTools
+        tools = VoiceMemoryTools()
+        await tools.ensure_initialized()
+        _memory_tools = tools
+    return _memory_tools
+
+
+def _queue_memory_event(src_path: Path, dest_path: Path, project_id: str) -> None:
+    """Hand a project move to the memory worker (started on first use in this loop)"""
+    global _memory_queue, _memory_worker_task
+    if _memory_worker_task is None or _memory_worker_task.done():
+        _memory_queue = asyncio.Queue(maxsize=_MEMORY_QUEUE_SIZE)
+        _memory_worker_task = asyncio.create_task(_memory_worker(_memory_queue))
+    try:
+        _memory_queue.put_nowait((src_path, dest_path, project_id))
+    except asyncio.QueueFull:
+        logger.warning(f"Memory queue full, not indexing move: {dest_path}")
+
+
+async def _memory_worker(queue: asyncio.Queue) -> None:
+    """Index queued moves one at a time, so memory-store writes never overlap"""
+    while True:
+        src_path, dest_path, project_id = await queue.get()
+        try:
+            await _index_moved_file(src_path, dest_path, project_id)
+        finally:
+            queue.task_done()
+
+
+async def _index_moved_file(src_path: Path, dest_path: Path, project_id: str) -> None:
+    """Index a file moved into a project and record a memory note about it"""
+    try:
+        memory_tools = await _get_memory_tools()
+        
+        # Index with basic description
+        await memory_tools.memory_system.index_file(
+            path=str(dest_path),
+            project_id=project_id,
+            description=f"File moved to project {project_id}",
+            tags=["file", "moved", dest_path.suffix]
+        )
+        
+        # Add Memory Note
+        await memory_tools.memory_system.add_memory(
+            content=f"Moved file '{src_path.name}' to project '{project_id}'. New location: {dest_path}",
+            source="system",
+            context=f"File Organization: {project_id}"
+        )
+        logger.info(f"Indexed file move to project: {project_id}")
+        
+    except Exception as mem_err:
+        logger.warning(f"Memory integration failed during move: {mem_err}")
+
+
 class FileTools:
     """File operations with Smart Sandbox Security"""
     
     # Sensitive directories to block explicitly
-    BLACKLIST_DIRS = {
-        '.ssh', '.aws', '.kube', 'Library', 'Applications', 
-        '.bashrc', '.zshrc', '.profile', '.env'
-    }
+    BLACKLIST_DIRS = _BLACKLIST_DIRS
     
     def __init__(self):
         self.home_dir = Path.home().resolve()
+        self._home_parts = self.home_dir.parts
         logger.info(f"FileTools initialized (Sandbox: {self.home_dir})")
     
     def _validate_path(self, path_str: str) -> Optional[Path]:
@@ -41,61 +484,44 @@ class FileTools:
         try:
             # 1. Handle Aliases
             clean_path = path_str.strip()
-            if clean_path.lower() in ["~", "home", "هيثم", "haitham"]:
+            clean_lower = clean_path.lower()
+            if clean_lower in _HOME_ALIASES:
                 return self.home_dir
 
             # Smart Folder Aliases (Handle case/plural variations)
-            COMMON_FOLDERS = {
-                "download": "Downloads", "downloads": "Downloads",
-                "document": "Documents", "documents": "Documents",
-                "desktop": "Desktop",
-                "picture": "Pictures", "pictures": "Pictures",
-                "movie": "Movies", "movies": "Movies",
-                "music": "Music",
-                "public": "Public"
-            }
-            
-            if clean_path.lower() in COMMON_FOLDERS:
-                return self.home_dir / COMMON_FOLDERS[clean_path.lower()]
+            if clean_lower in _COMMON_FOLDERS:
+                return self.home_dir / _COMMON_FOLDERS[clean_lower]
                 
             # 2. Resolve Path
-            # Expand user (~) and resolve absolute path
+            # Expand user (~) and resolve absolute path. Never cached: the sandbox
+            # check must see where a symlink points now, not where it used to
             target_path = Path(clean_path).expanduser().resolve()
             
             # SMART SEARCH: If path doesn't exist, try finding it in common folders
-            if not target_path.exists() and not clean_path.startswith("/"):
-                # Try Documents
-                doc_path = self.home_dir / "Documents" / clean_path
-                if doc_path.exists():
-                    return doc_path
-                
-                # Try Downloads
-                dl_path = self.home_dir / "Downloads" / clean_path
-                if dl_path.exists():
-                    return dl_path
-                    
-                # Try Desktop
-                dt_path = self.home_dir / "Desktop" / clean_path
-                if dt_path.exists():
-                    return dt_path
+            # (absolute and ~ paths are already fully specified: no probes)
+            if not clean_path.startswith(("/", "~")) and not target_path.exists():
+                for folder in _SMART_SEARCH_FOLDERS:
+                    candidate = self.home_dir / folder / clean_path
+                    if candidate.exists():
+                        return candidate
 
             # 3. Sandbox Check: Must be inside User Home
-            if not str(target_path).startswith(str(self.home_dir)):
+            # (tuple prefix compare: no str() round-trips, and /home/haitham2
+            # no longer passes as being inside /home/haitham)
+            parts = target_path.parts
+            home_len = len(self._home_parts)
+            if parts[:home_len] != self._home_parts:
                 logger.warning(f"Blocked access outside home: {target_path}")
                 return None
                 
             # 4. Blacklist Check: Sensitive folders
             # Check if any part of the relative path is blacklisted
-            try:
-                rel_path = target_path.relative_to(self.home_dir)
-                if any(part in self.BLACKLIST_DIRS for part in rel_path.parts):
-                    logger.warning(f"Blocked sensitive path: {target_path}")
-                    return None
-                # Block hidden files/folders generally (except .hva or specific allowed ones)
-                # Policy: Block hidden unless it's .hva or explicitly allowed?
-                # For now, let's just block the explicit blacklist.
-            except ValueError:
-                pass # Should not happen due to check #3
+            if not self.BLACKLIST_DIRS.isdisjoint(parts[home_len:]):
+                logger.warning(f"Blocked sensitive path: {target_path}")
+                return None
+            # Block hidden files/folders generally (except .hva or specific allowed ones)
+            # Policy: Block hidden unless it's .hva or explicitly allowed?
+            # For now, let's just block the explicit blacklist.
                 
             return target_path
             
@@ -111,6 +537,8 @@ class FileTools:
         pattern: Optional[str] = None,
         recursive: bool = False,
         sort_by: str = "name", # name, date, size
+        full_sort: bool = True, # False: only the displayed head is put in order
+        details: bool = True, # False: names/types only, no stat per entry
         **kwargs # Ignore extra params from LLM hallucinations
     ) -> Dict[str, Any]:
         """List files in a directory (Sandboxed)"""
@@ -123,42 +551,49 @@ class FileTools:
             if not dir_path:
                 return {"error": True, "message": f"Access denied or invalid path: {raw_dir}"}
             
-            if not dir_path.exists():
+            # One stat answers both "exists" and "is a directory"
+            exists, is_dir = _classify(dir_path)
+            if not exists:
                 # Try relative to home if not found
                 retry_path = self._validate_path(f"~/{raw_dir}")
-                if retry_path and retry_path.exists():
+                exists, is_dir = _classify(retry_path) if retry_path else (False, False)
+                if exists:
                     dir_path = retry_path
                 else:
                     return {"error": True, "message": f"Directory not found: {raw_dir}"}
 
-            if not dir_path.is_dir():
+            if not is_dir:
                 return {"error": True, "message": f"Not a directory: {dir_path.name}"}
             
-            # Execute List
-            files = []
-            scan_iter = dir_path.rglob(pattern or "*") if recursive else dir_path.glob(pattern or "*")
-            
-            for file_path in scan_iter:
-                # Skip blacklisted
-                if file_path.name in self.BLACKLIST_DIRS:
-                    continue
-                    
-                # Get info for both files and directories
-                files.append(self._get_file_info(file_path))
+            # Execute List (sort on DirEntry's cached stat, build dicts afterwards);
+            # the directory read runs on a worker thread
+            entries = await asyncio.to_thread(self._scan_entries, dir_path, pattern, recursive)
             
             # Sort files
             if sort_by == "date":
-                files.sort(key=lambda x: x.get("modified", 0), reverse=True)
+                sort_key, reverse = _entry_mtime, True
             elif sort_by == "size":
-                files.sort(key=lambda x: x.get("size", 0), reverse=True)
+                sort_key, reverse = _entry_size, True
             else: # name (default)
-                files.sort(key=lambda x: x.get("name", "").lower())
+                sort_key, reverse = (lambda e: e.name.lower()), False
+            
+            if full_sort or len(entries) <= _LIST_DISPLAY_LIMIT:
+                entries.sort(key=sort_key, reverse=reverse)
+            else:
+                # Only the head is shown: select it in O(N log 10), rest keeps scan order
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                top = select(_LIST_DISPLAY_LIMIT, entries, key=sort_key)
+                top_ids = set(map(id, top))
+                entries = top + [e for e in entries if id(e) not in top_ids]
+
+            # Get info for both files and directories
+            info = self._get_file_info if details else self._light_info
+            files = [info(entry) for entry in entries]
 
             # Format output
-            file_names = [f["name"] for f in files]
-            display_text = "\n".join(file_names[:10])
-            if len(files) > 10:
-                display_text += f"\n... and {len(files)-10} more"
+            display_text = "\n".join(f["name"] for f in files[:_LIST_DISPLAY_LIMIT])
+            if len(files) > _LIST_DISPLAY_LIMIT:
+                display_text += f"\n... and {len(files)-_LIST_DISPLAY_LIMIT} more"
             
             return {
                 "success": True,
@@ -185,7 +620,8 @@ class FileTools:
             if dir_path.exists():
                 return {"error": True, "message": "Directory already exists"}
             
-            dir_path.mkdir(parents=True, exist_ok=False)
+            await asyncio.to_thread(dir_path.mkdir, parents=True, exist_ok=False)
+            _forget_paths()
             logger.info(f"Created folder: {dir_path}")
             return {"status": "created", "directory": str(dir_path)}
             
@@ -195,12 +631,7 @@ class FileTools:
     async def delete_folder(self, directory: str, confirmed: bool = False, **kwargs) -> Dict[str, Any]:
         """Delete a folder (Sandboxed + Confirmation)"""
         if not confirmed:
-            return {
-                "status": "confirmation_required",
-                "message": f"Are you sure you want to delete '{directory}'?",
-                "command": "delete_folder",
-                "risk_level": "high"
-            }
+            return {**_CONFIRM_DELETE_FOLDER, "message": f"Are you sure you want to delete '{directory}'?"}
             
         try:
             dir_path = self._validate_path(directory)
@@ -214,7 +645,8 @@ class FileTools:
             if dir_path == self.home_dir or dir_path == self.home_dir / "Downloads" or dir_path == self.home_dir / "Documents":
                  return {"error": True, "message": "Safety Block: Cannot delete core system folders."}
 
-            shutil.rmtree(dir_path)
+            await asyncio.to_thread(shutil.rmtree, dir_path)
+            _forget_paths()
             logger.warning(f"Deleted folder: {dir_path}")
             return {"status": "deleted", "directory": str(dir_path)}
             
@@ -224,12 +656,7 @@ class FileTools:
     async def delete_file(self, path: str, confirmed: bool = False, **kwargs) -> Dict[str, Any]:
         """Delete a file (Sandboxed + Confirmation)"""
         if not confirmed:
-            return {
-                "status": "confirmation_required",
-                "message": f"Are you sure you want to delete file '{Path(path).name}'?",
-                "command": "files.delete_file",
-                "risk_level": "high"
-            }
+            return {**_CONFIRM_DELETE_FILE, "message": f"Are you sure you want to delete file '{Path(path).name}'?"}
             
         try:
             file_path = self._validate_path(path)
@@ -242,7 +669,8 @@ class FileTools:
             if not file_path.is_file():
                 return {"error": True, "message": "Not a file"}
 
-            os.remove(file_path)
+            await asyncio.to_thread(os.remove, file_path)
+            _forget_paths()
             logger.warning(f"Deleted file: {file_path}")
             return {"status": "deleted", "path": str(file_path)}
             
@@ -253,31 +681,40 @@ class FileTools:
         """Search files (Sandboxed)"""
         try:
             dir_path = self._validate_path(directory)
-            if not dir_path or not dir_path.exists():
+            if not dir_path or not _classify(dir_path)[0]:
                 # Try relative
                 dir_path = self._validate_path(f"~/{directory}")
-                if not dir_path or not dir_path.exists():
+                if not dir_path or not _classify(dir_path)[0]:
                     return {"error": True, "message": "Directory not found or access denied"}
             
-            matches = []
-            for file_path in dir_path.rglob(name_pattern):
-                if file_path.is_file():
-                    # Skip blacklisted
-                    if any(part in self.BLACKLIST_DIRS for part in file_path.parts):
-                        continue
-                        
-                    file_info = self._get_file_info(file_path)
-                    if content_pattern:
+            if content_pattern:
+                # Compiled once; a str regex so case folding covers non-ASCII letters too
+                content_regex = re.compile(re.escape(content_pattern), re.IGNORECASE)
+            
+            # The walk itself runs on a worker thread so a large tree doesn't stall the loop
+            hits = await asyncio.to_thread(self._collect_search_hits, dir_path, name_pattern, bool(content_pattern))
+            matches = [] if content_pattern else hits
+            candidates = hits if content_pattern else []
+            
+            if candidates:
+                # Content scans are I/O-bound: overlap them on worker threads
+                sem = asyncio.Semaphore(_CONTENT_SCAN_WORKERS)
+                
+                async def scan(file_info: Dict[str, Any]) -> bool:
+                    async with sem:
                         try:
-                            # Limit read size for safety
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read(100000) # Read first 100KB only
-                                if content_pattern.lower() in content.lower():
-                                    file_info["matched_content"] = True
-                                    matches.append(file_info)
-                        except:
-                            pass
-                    else:
+                            return await asyncio.wait_for(
+                                asyncio.to_thread(self._file_contains, file_info["path"], content_regex),
+                                timeout=_CONTENT_SCAN_TIMEOUT
+                            )
+                        except asyncio.TimeoutError:
+                            logger.warning(f"Content scan timed out: {file_info['path']}")
+                            return False
+                
+                found = await asyncio.gather(*(scan(info) for info in candidates))
+                for file_info, matched in zip(candidates, found):
+                    if matched:
+                        file_info["matched_content"] = True
                         matches.append(file_info)
             
             return {
@@ -299,9 +736,8 @@ class FileTools:
             if not target_path.exists():
                 return {"error": True, "message": "File not found"}
                 
-            # Use macOS 'open' command
-            import subprocess
-            subprocess.run(['open', str(target_path)], check=True)
+            # LaunchServices in-process when available, else macOS 'open'; off the event loop
+            await asyncio.to_thread(_open_with_default_app, str(target_path), target_path.is_dir())
             
             return {"status": "opened", "path": str(target_path)}
             
@@ -315,19 +751,36 @@ class FileTools:
             if not target_path:
                 return {"error": True, "message": "Access denied or invalid path"}
             
-            if not target_path.exists():
+            # One open + fstat replaces the exists/is_file/stat probes
+            # (O_NONBLOCK: opening a FIFO must not wait for a writer before fstat rejects it)
+            try:
+                fd = os.open(target_path, os.O_RDONLY | os.O_NONBLOCK)
+            except FileNotFoundError:
                 return {"error": True, "message": "File not found"}
-                
-            if not target_path.is_file():
+            except IsADirectoryError:
                 return {"error": True, "message": "Not a file"}
+            
+            try:
+                st = os.fstat(fd)
+                if not stat.S_ISREG(st.st_mode):
+                    return {"error": True, "message": "Not a file"}
+                    
+                # Check size
+                if st.st_size > 10 * 1024 * 1024: # 10MB limit
+                    return {"error": True, "message": "File too large to read directly"}
                 
-            # Check size
-            if target_path.stat().st_size > 10 * 1024 * 1024: # 10MB limit
-                return {"error": True, "message": "File too large to read directly"}
-
-            content = ""
-            with open(target_path, 'r', encoding='utf-8', errors='replace') as f:
-                content = f.read(max_length)
+                # UTF-8 is at most 4 bytes per character, so this always covers max_length chars
+                # (max_length <= 0 reads the whole file, like f.read(-1))
+                data = os.read(fd, min(max_length * 4, st.st_size) if max_length > 0 else st.st_size)
+            finally:
+                os.close(fd)
+            
+            content = data.decode('utf-8', errors='replace')
+            if '\r' in content:
+                # Same newline handling as text-mode reads
+                content = content.replace('\r\n', '\n').replace('\r', '\n')
+            if max_length > 0:
+                content = content[:max_length]
                 
             if len(content) == max_length:
                 content += "\n... (truncated)"
@@ -342,18 +795,142 @@ class FileTools:
         except Exception as e:
             return {"error": True, "message": str(e)}
 
-    def _get_file_info(self, file_path: Path) -> Dict[str, Any]:
-        """Get file metadata"""
+    def _scan_entries(self, dir_path: Path, pattern: Optional[str] = None, recursive: bool = False) -> List[os.DirEntry]:
+        """Raw directory scan shared by the listing tools (blacklisted names dropped)"""
+        return [
+            entry for entry in self._iter_scandir(dir_path, pattern, recursive)
+            if entry.name not in _BLACKLIST_DIRS
+        ]
+
+    def _collect_search_hits(self, dir_path: Path, name_pattern: str, skip_binary: bool) -> List[Dict[str, Any]]:
+        """File infos for every file under dir_path matching name_pattern"""
+        hits = []
+        for entry in self._iter_scandir(dir_path, name_pattern, recursive=True):
+            # Symlinks are not followed, so a link can't lead the scan out of the sandbox
+            if entry.is_file(follow_symlinks=False):
+                # Skip blacklisted (split the path string; no Path per entry)
+                if not self.BLACKLIST_DIRS.isdisjoint(entry.path.split(os.sep)):
+                    continue
+                if skip_binary and _suffix(entry.name).lower() in _BINARY_EXTENSIONS:
+                    continue
+                hits.append(self._get_file_info(entry))
+        return hits
+
+    @staticmethod
+    def _file_contains(path: str, regex: "re.Pattern") -> bool:
+        """Test the first _CONTENT_SCAN_LIMIT bytes of a file against the compiled content regex"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(_CONTENT_SCAN_LIMIT)
+        except OSError:
+            return False
+        return regex.search(data.decode('utf-8', errors='ignore')) is not None
+
+    def _iter_scandir(self, root: Path, pattern: Optional[str] = None, recursive: bool = False) -> Iterator[os.DirEntry]:
+        """
+        Walk a directory with os.scandir, yielding DirEntry objects whose
+        name (or relative path) matches the glob pattern.
+        DirEntry caches type/stat info, so no extra syscalls per entry.
+        """
+        root_str = str(root)
+        pattern = _normalize_pattern(pattern)
+        
+        # A literal relative path names at most one entry: read only its parent
+        # (recursive searches match it at any depth, so they walk the tree)
+        if not recursive and pattern and "/" in pattern and not _GLOB_MAGIC.search(pattern):
+            parts = pattern.split("/")
+            if all(part not in ("", ".", "..") for part in parts):
+                parent = os.path.join(root_str, *parts[:-1])
+                # Like the walk, never go through a symlinked directory
+                if os.path.realpath(parent) != os.path.join(os.path.realpath(root_str), *parts[:-1]):
+                    return
+                try:
+                    with os.scandir(parent) as it:
+                        for entry in it:
+                            if entry.name == parts[-1]:
+                                yield entry
+                                break
+                except OSError:
+                    pass
+                return
+        
+        # Start the walk below the pattern's literal directories so sibling
+        # subtrees are never read. Only non-recursive patterns are anchored at
+        # the root; a recursive 'sub/*.py' can match a/sub/ too, so that walks everything.
+        if not recursive:
+            prefix, tail = _split_pattern(pattern)
+            start = os.path.join(root_str, prefix)
+            # The full walk never follows symlinked dirs; neither may the prefix
+            # ('dir/**' includes dir itself, so that one keeps its parent as root)
+            if prefix and tail != "**" and os.path.realpath(start) == os.path.join(os.path.realpath(root_str), prefix):
+                root_str, pattern = start, tail
+        
+        regex, match_rel, max_depth = _compile_pattern(pattern, recursive)
+        # Non-recursive patterns like 'sub/*.py' or '**/*.py' still need to go down
+        walk = max_depth != 1
+        prefix_len = len(root_str.rstrip(os.sep)) + 1
+        stack = [(root_str, 1)]
+        prefetched = {}
+        
+        while stack:
+            current, depth = stack.pop()
+            pending = prefetched.pop(current, None)
+            
+            # Read the next queued directory in the background while this one is filtered
+            if walk and stack and stack[-1][0] not in prefetched:
+                prefetched[stack[-1][0]] = _SCANDIR_POOL.submit(_read_dir, stack[-1][0])
+            
+            if pending:
+                entries = pending.result()
+            else:
+                # A single-directory listing is often asked for again right away
+                entries = _read_dir(current) if walk else _read_dir_cached(current)
+            descend = walk and (max_depth is None or depth < max_depth)
+            for entry in entries:
+                target = entry.path[prefix_len:] if match_rel else entry.name
+                if regex.match(target):
+                    yield entry
+                
+                if descend:
+                    # Never descend into hidden, tooling or sensitive trees
+                    name = entry.name
+                    if name[0] == "." or name in _PRUNE_DIRS:
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, depth + 1))
+                    except OSError:
+                        pass
+
+    @staticmethod
+    def _light_info(entry: os.DirEntry) -> Dict[str, Any]:
+        """Name/path/type only; the type comes from the directory read, so no stat"""
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        return {
+            "name": entry.name,
+            "path": entry.path,
+            "extension": "DIR" if is_dir else _suffix(entry.name),
+            "type": "directory" if is_dir else "file"
+        }
+
+    def _get_file_info(self, file_path: Union[os.DirEntry, Path]) -> Dict[str, Any]:
+        """Get file metadata (accepts a scandir DirEntry or a Path)"""
         try:
-            stat = file_path.stat()
-            is_dir = file_path.is_dir()
+            # One stat per entry (cached on a DirEntry); the type comes from st_mode
+            st = file_path.stat()
+            is_dir = stat.S_ISDIR(st.st_mode)
+            name = file_path.name
+            path_str = str(file_path) if isinstance(file_path, Path) else file_path.path
             return {
-                "name": file_path.name,
-                "path": str(file_path),
-                "size": stat.st_size if not is_dir else 0,
-                "size_human": self._format_size(stat.st_size) if not is_dir else "DIR",
-                "modified": stat.st_mtime,
-                "extension": file_path.suffix if not is_dir else "DIR",
+                "name": name,
+                "path": path_str,
+                "size": st.st_size if not is_dir else 0,
+                "size_human": self._format_size(st.st_size) if not is_dir else "DIR",
+                "modified": st.st_mtime,
+                "extension": _suffix(name) if not is_dir else "DIR",
                 "type": "directory" if is_dir else "file"
             }
         except:
@@ -361,26 +938,87 @@ class FileTools:
     
     @staticmethod
     def _format_size(size: int) -> str:
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} TB"
+        # Pick the unit from the bit length instead of dividing in a loop
+        if size <= 0:
+            return "0.0 B"
+        i = min((int(size).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{size / (1 << (i * 10)):.1f} {_SIZE_UNITS[i]}"
+
+    @staticmethod
+    def _copy_with_metadata(src: str, dst: str) -> None:
+        """
+        copyfile keeps CPython's kernel fast path (sendfile/fcopyfile);
+        mode and timestamps are then applied like copy2 would.
+        """
+        shutil.copyfile(src, dst)
+        st = os.stat(src)
+        os.chmod(dst, st.st_mode & 0o7777)
+        os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    async def copy_file(self, source: str, destination: str, overwrite: bool = False, **kwargs) -> Dict[str, Any]:
+        """Copy a file from source to destination (Sandboxed)"""
+        try:
+            src_path = self._validate_path(source)
+            dest_path = self._validate_path(destination)
+            
+            if not src_path or not dest_path:
+                return {"error": True, "message": "Access denied or invalid path"}
+            
+            if not src_path.exists():
+                return {"error": True, "message": f"Source file not found: {source}"}
+            
+            if not src_path.is_file():
+                return {"error": True, "message": f"Source is not a file: {src_path.name}"}
+            
+            # If destination is a directory, append filename
+            if dest_path.is_dir():
+                dest_path = dest_path / src_path.name
+            elif not dest_path.parent.exists():
+                dest_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Auto-rename instead of overwriting (the new name is claimed atomically)
+            reserved = False
+            if dest_path.exists() and not overwrite:
+                dest_path = await asyncio.to_thread(_reserve_unique_path, dest_path)
+                reserved = True
+                logger.info(f"Destination exists, renamed to: {dest_path.name}")
+            
+            # Large copies must not stall the event loop;
+            # the copy fills the reserved placeholder
+            try:
+                await asyncio.to_thread(self._copy_with_metadata, str(src_path), str(dest_path))
+            except Exception:
+                if reserved:
+                    try:
+                        os.unlink(dest_path)
+                    except OSError:
+                        pass
+                raise
+            _forget_paths()
+            logger.info(f"Copied file: {src_path} -> {dest_path}")
+            
+            return {
+                "status": "copied",
+                "source": str(src_path),
+                "destination": str(dest_path),
+                "message": f"Copied {src_path.name} to {dest_path.parent.name}"
+            }
+            
+        except Exception as e:
+            return {"error": True, "message": str(e)}
 
     async def move_file(self, source: str, destination: str, overwrite: bool = False, confirmed: bool = False, **kwargs) -> Dict[str, Any]:
         """Move a file from source to destination (Sandboxed)"""
         if not confirmed:
             return {
-                "status": "confirmation_required",
+                **_CONFIRM_MOVE_FILE,
                 "message": f"Are you sure you want to move '{Path(source).name}' to '{Path(destination).name}'?",
-                "command": "files.move_file",
                 "params": {
                     "source": source,
                     "destination": destination,
                     "overwrite": overwrite,
                     "confirmed": True
-                },
-                "risk_level": "medium"
+                }
             }
 
         try:
@@ -411,51 +1049,38 @@ class FileTools:
                  dest_path.parent.mkdir(parents=True, exist_ok=True)
 
             # Check for overwrite
+            reserved = False
             if dest_path.exists() and not overwrite:
-                # Auto-rename if not overwriting
-                base = dest_path.stem
-                suffix = dest_path.suffix
-                counter = 1
-                while dest_path.exists():
-                    dest_path = dest_path.with_name(f"{base}_{counter}{suffix}")
-                    counter += 1
+                # Auto-rename if not overwriting (the new name is claimed atomically)
+                dest_path = await asyncio.to_thread(_reserve_unique_path, dest_path)
+                reserved = True
                 logger.info(f"Destination exists, renamed to: {dest_path.name}")
 
-            # Perform Move
-            shutil.move(str(src_path), str(dest_path))
+            # Perform Move (may fall back to a full copy across devices);
+            # the move replaces the reserved placeholder in one step
+            try:
+                await asyncio.to_thread(_move_path, str(src_path), str(dest_path))
+            except Exception:
+                if reserved:
+                    try:
+                        os.unlink(dest_path)
+                    except OSError:
+                        pass
+                raise
+            _forget_paths()
             logger.info(f"Moved file: {src_path} -> {dest_path}")
             
             # --- Memory Integration ---
             try:
-                from haitham_voice_agent.tools.workspace_manager import workspace_manager
-                from haitham_voice_agent.tools.memory.voice_tools import VoiceMemoryTools
-                
                 # Check if destination is within a project
-                projects_root = workspace_manager.projects_root
-                if str(dest_path).startswith(str(projects_root)):
+                root_parts = _get_projects_root_parts()
+                dest_parts = dest_path.parts
+                if dest_parts[:len(root_parts)] == root_parts:
                     # Extract project ID
-                    rel_path = dest_path.relative_to(projects_root)
-                    project_id = rel_path.parts[0]
-                    
-                    # Index the file
-                    memory_tools = VoiceMemoryTools()
-                    await memory_tools.ensure_initialized()
+                    project_id = dest_parts[len(root_parts)]
                     
-                    # Index with basic description
-                    await memory_tools.memory_system.index_file(
-                        path=str(dest_path),
-                        project_id=project_id,
-                        description=f"File moved to project {project_id}",
-                        tags=["file", "moved", dest_path.suffix]
-                    )
-                    
-                    # Add Memory Note
-                    await memory_tools.memory_system.add_memory(
-                        content=f"Moved file '{src_path.name}' to project '{project_id}'. New location: {dest_path}",
-                        source="system",
-                        context=f"File Organization: {project_id}"
-                    )
-                    logger.info(f"Indexed file move to project: {project_id}")
+                    # Indexing runs in the background; the move result doesn't depend on it
+                    _queue_memory_event(src_path, dest_path, project_id)
                     
             except Exception as mem_err:
                 logger.warning(f"Memory integration failed during move: {mem_err}")
@@ -475,16 +1100,14 @@ class FileTools:
         """Move all files from source directory to destination directory"""
         if not confirmed:
             return {
-                "status": "confirmation_required",
+                **_CONFIRM_MOVE_ALL_FILES,
                 "message": f"Are you sure you want to move ALL files from '{Path(source_dir).name}' to '{Path(dest_dir).name}'?",
-                "command": "files.move_all_files",
                 "params": {
                     "source_dir": source_dir,
                     "dest_dir": dest_dir,
                     "overwrite": overwrite,
                     "confirmed": True
-                },
-                "risk_level": "high"
+                }
             }
 
         try:
@@ -500,28 +1123,11 @@ class FileTools:
             if not dest_path.exists():
                 dest_path.mkdir(parents=True, exist_ok=True)
                 
-            moved_count = 0
-            errors = []
+            # One worker-thread pass over the source instead of a thread hop per file
+            moved_count, errors = await asyncio.to_thread(self._move_dir_files, src_path, dest_path, overwrite)
             
-            for item in src_path.iterdir():
-                if item.is_file() and item.name not in self.BLACKLIST_DIRS and not item.name.startswith("."):
-                    try:
-                        # Construct destination path
-                        target = dest_path / item.name
-                        
-                        # Handle overwrite/rename
-                        if target.exists() and not overwrite:
-                            base = target.stem
-                            suffix = target.suffix
-                            counter = 1
-                            while target.exists():
-                                target = target.with_name(f"{base}_{counter}{suffix}")
-                                counter += 1
-                        
-                        shutil.move(str(item), str(target))
-                        moved_count += 1
-                    except Exception as e:
-                        errors.append(f"{item.name}: {str(e)}")
+            if moved_count:
+                _forget_paths()
             
             return {
                 "status": "completed",
@@ -535,6 +1141,48 @@ class FileTools:
         except Exception as e:
             return {"error": True, "message": str(e)}
 
+    def _move_dir_files(self, src_path: Path, dest_path: Path, overwrite: bool):
+        """Move the top-level files of src_path into dest_path; returns (moved_count, errors)"""
+        moved_count = 0
+        errors = []
+        
+        # Existing names are read once; collisions are resolved against this set.
+        # Compared case-folded, since the default macOS filesystem is case-insensitive.
+        dest_names = set() if overwrite else {name.casefold() for name in os.listdir(dest_path)}
+        
+        # rename(2) is enough when both sides share a filesystem
+        same_device = os.stat(src_path).st_dev == os.stat(dest_path).st_dev
+        
+        with os.scandir(src_path) as it:
+            for entry in it:
+                # Name checks first (free); is_file() is answered from d_type
+                # except for symlinks, which still get followed as before
+                if not entry.name.startswith(".") and entry.name not in self.BLACKLIST_DIRS and entry.is_file():
+                    try:
+                        # Handle overwrite/rename
+                        name = entry.name
+                        if name.casefold() in dest_names:
+                            suffix = _suffix(name)
+                            base = name[:-len(suffix)] if suffix else name
+                            counter = 1
+                            while name.casefold() in dest_names:
+                                name = f"{base}_{counter}{suffix}"
+                                counter += 1
+                        
+                        target = os.path.join(dest_path, name)
+                        if same_device:
+                            os.rename(entry.path, target)
+                        else:
+                            shutil.move(entry.path, target)
+                        
+                        if not overwrite:
+                            dest_names.add(name.casefold())
+                        moved_count += 1
+                    except Exception as e:
+                        errors.append(f"{entry.name}: {str(e)}")
+        
+        return moved_count, errors
+
     async def organize_documents(self, path: str = None, mode: str = "deep", language: str = "Arabic", instruction: str = None, **kwargs) -> Dict[str, Any]:
         """
         Analyze and propose reorganization for a folder.
@@ -571,8 +1219,12 @@ class FileTools:
             if not target_path_obj:
                  return {"error": True, "message": f"Could not find folder: {target_path}"}
             
+            # Classify the instruction once; reused for routing and the sort description
+            wants_flatten = bool(instruction and _FLATTEN_RE.search(instruction))
+            wants_date = bool(instruction and _DATE_RE.search(instruction))
+            
             # SMART ROUTING: If instruction implies "Date Sorting" or "Flattening", force Simple Mode (Deterministic)
-            if instruction and ("date" in instruction.lower() or "تاريخ" in instruction or "direct" in instruction.lower() or "flatten" in instruction.lower() or "مباشر" in instruction or "بدون مجلدات" in instruction or "الغي المجلدات" in instruction or "إلغاء المجلدات" in instruction):
+            if wants_date or wants_flatten:
                 mode = "simple"
                 logger.info(f"Instruction '{instruction}' implies Simple Mode (Date/Flatten).")
             else:
@@ -586,10 +1238,10 @@ class FileTools:
                 if plan.get("error"):
                     return {"error": True, "message": plan["error"]}
                     
-                if instruction and ("direct" in instruction.lower() or "flatten" in instruction.lower() or "مباشر" in instruction or "بدون مجلدات" in instruction or "الغي المجلدات" in instruction or "إلغاء المجلدات" in instruction):
+                if wants_flatten:
                     sort_type = "بشكل مباشر (بدون مجلدات)"
                     sort_type_en = "directly (flattened)"
-                elif instruction and ("date" in instruction.lower() or "تاريخ" in instruction):
+                elif wants_date:
                     sort_type = "حسب التاريخ"
                     sort_type_en = "by date"
                 else:
@@ -617,10 +1269,7 @@ class FileTools:
                     msg = f"I've analyzed {target_path_obj} (Deep Mode). Found {len(plan.get('changes', []))} files to organize intelligently."
             
             # Cache the plan for confirmation
-            import json
-            CACHE_FILE = Path("/tmp/hva_last_plan.json")
-            with open(CACHE_FILE, 'w') as f:
-                json.dump(plan, f)
+            _save_plan(plan)
 
             return {
                 "status": "plan_ready",
@@ -641,15 +1290,11 @@ class FileTools:
             confirm: If True, implies user confirmation of pending plan.
             mode: "deep" or "simple"
         """
-        CACHE_FILE = Path("/tmp/hva_last_plan.json")
-        
         # If confirm is True and no plan, try to load from cache
         if confirm and not plan:
-            if CACHE_FILE.exists():
-                import json
+            if _PLAN_CACHE_FILE.exists():
                 try:
-                    with open(CACHE_FILE, 'r') as f:
-                        plan = json.load(f)
+                    plan = _load_plan()
                 except:
                     return {"error": True, "message": "Failed to retrieve pending plan."}
             else:
@@ -660,9 +1305,7 @@ class FileTools:
 
         # Save plan to cache if it was passed explicitly (so we can confirm it later if needed)
         if plan and not confirm:
-             import json
-             with open(CACHE_FILE, 'w') as f:
-                 json.dump(plan, f)
+             _save_plan(plan)
         
         # Delegate execution to the appropriate organizer
         try:
@@ -697,51 +1340,75 @@ class FileTools:
 
 
 
-    async def get_file_tree(self, path: str = "~", depth: int = 2, **kwargs) -> Dict[str, Any]:
+    def _build_tree(self, root_path: Path, depth: int, max_entries_per_dir: int = 500) -> Optional[Dict[str, Any]]:
+        """
+        Build the nested tree dict with an explicit stack and one scandir per
+        directory. Directories deeper than depth are left out; files directly
+        inside the deepest listed directories are still included.
+        """
+        if depth < 0:
+            return None
+        
+        root = {
+            "name": root_path.name,
+            "path": str(root_path),
+            "type": "directory",
+            "children": []
+        }
+        stack = [(str(root_path), root, 0)]
+        
+        while stack:
+            current, node, current_depth = stack.pop()
+            # Subdirectories past the depth limit are dropped before the cap,
+            # so they can't crowd the files out of a clipped listing
+            at_limit = current_depth + 1 > depth
+            # Skip hidden/blacklisted (unreadable directories come back empty);
+            # names are never empty, so [0] is a plain character compare
+            items = [
+                e for e in _read_dir_cached(current)
+                if e.name[0] != "." and e.name not in _BLACKLIST_DIRS
+                and not (at_limit and e.is_dir())
+            ]
+            
+            # Sort directories first, then files (is_dir() comes from d_type);
+            # huge directories are clipped to their first max_entries_per_dir
+            if len(items) > max_entries_per_dir:
+                items = heapq.nsmallest(max_entries_per_dir, items, key=_tree_order)
+                node["truncated"] = True
+            else:
+                items.sort(key=_tree_order)
+            
+            children = node["children"]
+            for item in items:
+                if item.is_dir():
+                    child = {
+                        "name": item.name,
+                        "path": item.path,
+                        "type": "directory",
+                        "children": []
+                    }
+                    children.append(child)
+                    stack.append((item.path, child, current_depth + 1))
+                else:
+                    # Add file node (leaf)
+                    children.append({
+                        "name": item.name,
+                        "path": item.path,
+                        "type": "file",
+                        "extension": _suffix(item.name)
+                    })
+        
+        return root
+
+    async def get_file_tree(self, path: str = "~", depth: int = 2, max_entries_per_dir: int = 500, **kwargs) -> Dict[str, Any]:
         """Get file system tree structure (Sandboxed)"""
         try:
             root_path = self._validate_path(path)
-            if not root_path or not root_path.exists() or not root_path.is_dir():
+            if not root_path or not _classify(root_path)[1]:
                 return {"error": True, "message": "Invalid directory"}
 
-            def build_tree(current_path: Path, current_depth: int):
-                if current_depth > depth:
-                    return None
-                
-                node = {
-                    "name": current_path.name,
-                    "path": str(current_path),
-                    "type": "directory",
-                    "children": []
-                }
-                
-                try:
-                    # Sort directories first, then files
-                    items = sorted(list(current_path.iterdir()), key=lambda x: (not x.is_dir(), x.name.lower()))
-                    
-                    for item in items:
-                        # Skip hidden/blacklisted
-                        if item.name.startswith(".") or item.name in self.BLACKLIST_DIRS:
-                            continue
-                            
-                        if item.is_dir():
-                            child = build_tree(item, current_depth + 1)
-                            if child:
-                                node["children"].append(child)
-                        else:
-                            # Add file node (leaf)
-                            node["children"].append({
-                                "name": item.name,
-                                "path": str(item),
-                                "type": "file",
-                                "extension": item.suffix
-                            })
-                except PermissionError:
-                    pass
-                    
-                return node
-
-            tree = build_tree(root_path, 0)
+            # Tree building is all blocking directory reads: keep it off the event loop
+            tree = await asyncio.to_thread(self._build_tree, root_path, depth, max_entries_per_dir)
             return {"success": True, "tree": tree}
             
         except Exception as e:
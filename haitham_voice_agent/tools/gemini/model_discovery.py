@@ -8,7 +8,7 @@ Called once at startup to map logical model names to real API model strings.
 import google.generativeai as genai
 import re
 import logging
-from typing import Dict
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +19,47 @@ FALLBACKS = {
 }
 
 
-def get_best_model(pattern: str, fallback: str) -> str:
+# Model families resolved at startup (compiled once)
+FLASH_PATTERN = re.compile(r"gemini-[2-9]\.\d+-flash", re.IGNORECASE)
+PRO_PATTERN = re.compile(r"gemini-[2-9]\.\d+-pro", re.IGNORECASE)  # 1.5 is deprecated/stopped, so only 2.x+ or 3.x+
+
+
+def _list_generation_models() -> List[str]:
+    """Names of all models that support generateContent (one API round-trip)"""
+    return [
+        m.name
+        for m in genai.list_models()
+        if "generateContent" in getattr(m, "supported_generation_methods", [])
+    ]
+
+
+def _pick_best(models: List[str], regex: "re.Pattern", fallback: str) -> str:
+    """Latest model name matching regex, or fallback"""
+    # Exclude 'tts' or 'audio' models which might not support text generation
+    matches = [
+        m for m in models
+        if regex.search(m)
+        and "tts" not in m.lower()
+        and "audio" not in m.lower()
+    ]
+    
+    if not matches:
+        logger.warning(
+            "No Gemini models matched pattern %s, using fallback %s",
+            regex.pattern,
+            fallback
+        )
+        return fallback
+    
+    # Simple heuristic: pick the highest name
+    # This assumes newer versions sort higher lexicographically
+    best_match = max(matches)
+    
+    logger.info("Pattern %s matched: %s", regex.pattern, best_match)
+    return best_match
+
+
+def get_best_model(pattern: str, fallback: str, models: Optional[List[str]] = None) -> str:
     """
     Find the latest model version matching the regex pattern.
     If anything goes wrong, return the fallback.
@@ -27,42 +67,15 @@ def get_best_model(pattern: str, fallback: str) -> str:
     Args:
         pattern: Regex pattern to match model names
         fallback: Safe fallback model name
+        models: Already-listed model names (skips the API call)
         
     Returns:
         str: Best matching model name or fallback
     """
     try:
-        # List all available models
-        models = [
-            m.name
-            for m in genai.list_models()
-            if "generateContent" in getattr(m, "supported_generation_methods", [])
-        ]
-        
-        # Filter by pattern
-        # Exclude 'tts' or 'audio' models which might not support text generation
-        matches = [
-            m for m in models 
-            if re.search(pattern, m, re.IGNORECASE) 
-            and "tts" not in m.lower() 
-            and "audio" not in m.lower()
-        ]
-        
-        if not matches:
-            logger.warning(
-                "No Gemini models matched pattern %s, using fallback %s",
-                pattern,
-                fallback
-            )
-            return fallback
-        
-        # Simple heuristic: sort descending and pick the first
-        # This assumes newer versions sort higher lexicographically
-        matches.sort(reverse=True)
-        best_match = matches[0]
-        
-        logger.info("Pattern %s matched: %s", pattern, best_match)
-        return best_match
+        if models is None:
+            models = _list_generation_models()
+        return _pick_best(models, re.compile(pattern, re.IGNORECASE), fallback)
         
     except Exception as exc:
         logger.warning(
@@ -83,18 +96,18 @@ def resolve_gemini_mapping() -> Dict[str, str]:
     """
     logger.info("[HVA] Discovering Gemini Models...")
     
+    # List the catalog once and resolve both roles from it
+    try:
+        models = _list_generation_models()
+    except Exception as exc:
+        logger.warning("Error while listing Gemini models: %s. Using fallbacks", exc)
+        models = []
+    
     # Discover Flash variant (2.x or higher)
-    flash_real = get_best_model(
-        r"gemini-[2-9]\.\d+-flash",
-        FALLBACKS["flash"]
-    )
+    flash_real = _pick_best(models, FLASH_PATTERN, FALLBACKS["flash"])
     
     # Discover Pro variant (2.0 or higher)
-    # Note: 1.5 is deprecated/stopped, so we only look for 2.x+ or 3.x+
-    pro_real = get_best_model(
-        r"gemini-[2-9]\.\d+-pro",
-        FALLBACKS["pro"]
-    )
+    pro_real = _pick_best(models, PRO_PATTERN, FALLBACKS["pro"])
     
     logger.info("Logical Flash mapped to: %s", flash_real)
     logger.info("Logical Pro   mapped to: %s", pro_real)
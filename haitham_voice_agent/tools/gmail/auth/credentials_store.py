@@ -1,29 +1,121 @@
 """
 Secure Credential Storage
 
-Uses macOS Keychain for encryption key storage and Fernet for credential encryption.
+Uses macOS Keychain for encryption key storage and AES-GCM for credential
+encryption (files written by older versions with Fernet are migrated on read).
 From Gmail Module SRS Section 6.1.
 """
 
+import os
+import base64
+import copy
 import json
 import logging
+import tempfile
+import threading
+from types import MappingProxyType
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Mapping, Optional, Sequence, Tuple
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 import keyring
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from haitham_voice_agent.config import Config
 
 logger = logging.getLogger(__name__)
 
 
+def _dumps(credential: Dict[str, Any]) -> bytes:
+    """Serialize a credential straight to the bytes that get encrypted"""
+    if HAS_ORJSON:
+        return orjson.dumps(credential)
+    return json.dumps(credential).encode()
+
+
+def _loads(data: bytes) -> Dict[str, Any]:
+    """Parse decrypted credential bytes"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Credential files: magic + 12-byte nonce + AES-GCM ciphertext/tag.
+# Fernet tokens (the old format) always start with "gAAAAA", never with this.
+_AEAD_MAGIC = b"HVA1"
+_NONCE_SIZE = 12
+
+# Upper bound for a single credential file read
+_MAX_CREDENTIAL_SIZE = 64 * 1024
+
+# The Keychain key and its ciphers are loaded once per process and
+# shared by every CredentialStore (a Keychain read costs ~100-200 ms)
+_cached_key: Optional[bytes] = None
+_cached_cipher: Optional[Fernet] = None
+_cached_aead: Optional[AESGCM] = None
+_key_lock = threading.Lock()
+
+
+def _clear_key_cache() -> None:
+    """Forget the cached key/ciphers (tests only)"""
+    global _cached_key, _cached_cipher, _cached_aead
+    with _key_lock:
+        _cached_key = None
+        _cached_cipher = None
+        _cached_aead = None
+
+
+def _write_atomic(path: Path, chunks: Sequence[bytes]) -> None:
+    """
+    Write chunks via an owner-only temp file and rename it over path, so a
+    reader sees either the old or the new file, never a partly written one.
+    The chunks go out in one writev, without being joined first.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        try:
+            written = os.writev(fd, chunks)
+            total = sum(len(chunk) for chunk in chunks)
+            if written < total:
+                # Short write (not expected for a small regular file)
+                rest = memoryview(b"".join(chunks))[written:]
+                while rest:
+                    rest = rest[os.write(fd, rest):]
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _derive_aead_key(key: bytes) -> bytes:
+    """AES-256 key derived from the Keychain (Fernet) key, so no second Keychain item is needed"""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"hva-credentials-aes-gcm"
+    ).derive(base64.urlsafe_b64decode(key))
+
+
 class CredentialStore:
     """
     Secure credential storage using macOS Keychain
     
     Encryption flow:
     1. Generate/retrieve encryption key from Keychain
-    2. Use Fernet to encrypt credentials
+    2. Use AES-GCM (key derived from it) to encrypt credentials
     3. Store encrypted credentials in files
     4. Never log credentials or keys
     """
@@ -36,13 +128,71 @@ class CredentialStore:
         # Ensure credentials directory exists
         self.credentials_dir.mkdir(parents=True, exist_ok=True)
         
-        # Get or create encryption key
-        self.cipher = self._initialize_cipher()
+        # Get or create encryption key (Fernet is kept to read old files)
+        self.cipher, self.aead = self._initialize_cipher()
+        
+        # Decrypted credentials by service: (file mtime_ns, credential).
+        # The mtime check picks up files rewritten by other processes.
+        self._cache: Dict[str, tuple] = {}
+        self._cache_lock = threading.RLock()
+        
+        # Per-service locks: writes and cache misses for one service are
+        # serialized without blocking lookups of the others
+        self._service_locks: Dict[str, threading.RLock] = {}
+        
+        # Credential file path per service (the set of services is small and fixed)
+        self._paths: Dict[str, Path] = {}
         
         logger.info("CredentialStore initialized with macOS Keychain")
     
-    def _initialize_cipher(self) -> Fernet:
-        """Initialize Fernet cipher with key from Keychain"""
+    def _initialize_cipher(self) -> Tuple[Fernet, AESGCM]:
+        """Initialize the ciphers with key from Keychain (once per process)"""
+        global _cached_key, _cached_cipher, _cached_aead
+        
+        if _cached_aead is not None:
+            return _cached_cipher, _cached_aead
+        
+        with _key_lock:
+            # Another thread may have loaded it while we waited
+            if _cached_aead is not None:
+                return _cached_cipher, _cached_aead
+            
+            key = self._load_key()
+            _cached_cipher = Fernet(key)
+            _cached_aead = AESGCM(_derive_aead_key(key))
+            _cached_key = key
+            return _cached_cipher, _cached_aead
+    
+    def _lock_for(self, service: str) -> threading.RLock:
+        """Lock guarding one service's file and cache entry"""
+        lock = self._service_locks.get(service)
+        if lock is None:
+            with self._cache_lock:
+                lock = self._service_locks.setdefault(service, threading.RLock())
+        return lock
+    
+    def _path_for(self, service: str) -> Path:
+        """Encrypted file for a service"""
+        path = self._paths.get(service)
+        if path is None:
+            path = self._paths[service] = self.credentials_dir / f"{service}.enc"
+        return path
+    
+    def _encrypt(self, plaintext: bytes) -> Tuple[bytes, bytes, bytes]:
+        """AES-GCM encrypt with a fresh random nonce; returns the file's parts (magic, nonce, ciphertext)"""
+        nonce = os.urandom(_NONCE_SIZE)
+        return _AEAD_MAGIC, nonce, self.aead.encrypt(nonce, plaintext, None)
+    
+    def _decrypt(self, data: bytes) -> Tuple[bytes, bool]:
+        """Decrypt a credential file; the flag is True for an old Fernet token"""
+        if data.startswith(_AEAD_MAGIC):
+            start = len(_AEAD_MAGIC)
+            nonce = data[start:start + _NONCE_SIZE]
+            return self.aead.decrypt(nonce, data[start + _NONCE_SIZE:], None), False
+        return self.cipher.decrypt(data), True
+    
+    def _load_key(self) -> bytes:
+        """Read the encryption key from Keychain, creating it on first use"""
         try:
             # Try to retrieve existing key from Keychain
             key_str = keyring.get_password(self.service_name, self.key_name)
@@ -59,7 +209,7 @@ class CredentialStore:
                 keyring.set_password(self.service_name, self.key_name, key_str)
                 logger.info("Generated and stored new encryption key in Keychain")
             
-            return Fernet(key)
+            return key
             
         except Exception as e:
             logger.error(f"Failed to initialize cipher: {e}")
@@ -77,15 +227,19 @@ class CredentialStore:
             bool: Success status
         """
         try:
-            # Convert to JSON
-            credential_json = json.dumps(credential)
-            
-            # Encrypt
-            encrypted = self.cipher.encrypt(credential_json.encode())
+            # Convert to JSON and encrypt
+            encrypted = self._encrypt(_dumps(credential))
             
-            # Store in file
-            credential_file = self.credentials_dir / f"{service}.enc"
-            credential_file.write_bytes(encrypted)
+            # Store in file; the service lock keeps the file and its cache entry in step
+            credential_file = self._path_for(service)
+            with self._lock_for(service):
+                _write_atomic(credential_file, encrypted)
+                
+                with self._cache_lock:
+                    self._cache[service] = (
+                        credential_file.stat().st_mtime_ns,
+                        MappingProxyType(copy.deepcopy(credential))
+                    )
             
             logger.info(f"Stored encrypted credential for: {service}")
             return True
@@ -94,7 +248,7 @@ class CredentialStore:
             logger.error(f"Failed to store credential for {service}: {e}")
             return False
     
-    def retrieve_credential(self, service: str) -> Optional[Dict[str, Any]]:
+    def retrieve_credential(self, service: str) -> Optional[Mapping[str, Any]]:
         """
         Decrypt and retrieve credential
         
@@ -102,23 +256,27 @@ class CredentialStore:
             service: Service name
             
         Returns:
-            dict: Decrypted credential or None if not found
+            Mapping: Decrypted credential (a read-only view shared with the
+            cache - do not mutate nested values) or None if not found
         """
         try:
-            credential_file = self.credentials_dir / f"{service}.enc"
+            credential_file = self._path_for(service)
             
-            if not credential_file.exists():
+            try:
+                mtime_ns = credential_file.stat().st_mtime_ns
+            except FileNotFoundError:
+                with self._cache_lock:
+                    self._cache.pop(service, None)
                 logger.debug(f"No credential found for: {service}")
                 return None
             
-            # Read encrypted data
-            encrypted = credential_file.read_bytes()
-            
-            # Decrypt
-            decrypted = self.cipher.decrypt(encrypted)
+            # Unchanged since the last read/write: skip the read + decrypt + parse
+            with self._cache_lock:
+                cached = self._cache.get(service)
+            if cached and cached[0] == mtime_ns:
+                return cached[1]
             
-            # Parse JSON
-            credential = json.loads(decrypted.decode())
+            credential = self._load_credential(service, credential_file)
             
             logger.debug(f"Retrieved credential for: {service}")
             return credential
@@ -127,6 +285,76 @@ class CredentialStore:
             logger.error(f"Failed to retrieve credential for {service}: {e}")
             return None
     
+    def retrieve_all(self) -> Dict[str, Mapping[str, Any]]:
+        """
+        Decrypt every stored credential in one directory pass and cache them,
+        so later retrieve_credential calls are cache hits
+        
+        Returns:
+            dict: Service name -> decrypted credential (read-only view)
+        """
+        credentials = {}
+        try:
+            with os.scandir(self.credentials_dir) as it:
+                entries = [e for e in it if e.name.endswith(".enc") and e.is_file()]
+        except Exception as e:
+            logger.error(f"Failed to list credentials: {e}")
+            return credentials
+        
+        for entry in entries:
+            service = entry.name[:-4]
+            try:
+                mtime_ns = entry.stat().st_mtime_ns
+                with self._cache_lock:
+                    cached = self._cache.get(service)
+                if cached and cached[0] == mtime_ns:
+                    credentials[service] = cached[1]
+                else:
+                    credentials[service] = self._load_credential(service, Path(entry.path))
+            except Exception as e:
+                logger.error(f"Failed to retrieve credential for {service}: {e}")
+        
+        logger.debug(f"Retrieved {len(credentials)} credentials")
+        return credentials
+    
+    def _load_credential(self, service: str, credential_file: Path) -> Mapping[str, Any]:
+        """Read, decrypt and parse one credential file, caching the result"""
+        with self._lock_for(service):
+            # Read encrypted data: one unbuffered read (the files are a few hundred bytes);
+            # fstat tags the cache entry with the version actually read
+            fd = os.open(credential_file, os.O_RDONLY)
+            try:
+                mtime_ns = os.fstat(fd).st_mtime_ns
+                
+                # Another thread may have loaded this version while we waited
+                cached = self._cache.get(service)
+                if cached and cached[0] == mtime_ns:
+                    return cached[1]
+                
+                encrypted = os.read(fd, _MAX_CREDENTIAL_SIZE)
+            finally:
+                os.close(fd)
+            
+            # Decrypt
+            decrypted, legacy = self._decrypt(encrypted)
+            
+            # Parse JSON (a fresh dict nothing else holds; callers get a read-only view)
+            credential = MappingProxyType(_loads(decrypted))
+            
+            # One-time migration of a Fernet file to AES-GCM
+            if legacy:
+                try:
+                    _write_atomic(credential_file, self._encrypt(decrypted))
+                    mtime_ns = credential_file.stat().st_mtime_ns
+                    logger.info(f"Re-encrypted credential for {service} with AES-GCM")
+                except OSError as e:
+                    logger.warning(f"Could not re-encrypt credential for {service}: {e}")
+            
+            with self._cache_lock:
+                self._cache[service] = (mtime_ns, credential)
+            
+            return credential
+    
     def delete_credential(self, service: str) -> bool:
         """
         Delete stored credential
@@ -138,15 +366,19 @@ class CredentialStore:
             bool: Success status
         """
         try:
-            credential_file = self.credentials_dir / f"{service}.enc"
+            credential_file = self._path_for(service)
             
-            if credential_file.exists():
-                credential_file.unlink()
-                logger.info(f"Deleted credential for: {service}")
-                return True
-            else:
-                logger.debug(f"No credential to delete for: {service}")
-                return False
+            with self._lock_for(service):
+                with self._cache_lock:
+                    self._cache.pop(service, None)
+                
+                if credential_file.exists():
+                    credential_file.unlink()
+                    logger.info(f"Deleted credential for: {service}")
+                    return True
+                else:
+                    logger.debug(f"No credential to delete for: {service}")
+                    return False
                 
         except Exception as e:
             logger.error(f"Failed to delete credential for {service}: {e}")
@@ -162,8 +394,11 @@ class CredentialStore:
         Returns:
             bool: True if credential exists
         """
-        credential_file = self.credentials_dir / f"{service}.enc"
-        return credential_file.exists()
+        # A cached credential was read or written by this store, and
+        # delete_credential drops it, so only a miss needs the stat
+        if service in self._cache:
+            return True
+        return self._path_for(service).exists()
     
     def list_credentials(self) -> list:
         """
@@ -173,27 +408,31 @@ class CredentialStore:
             list: Service names
         """
         try:
-            services = []
-            for file in self.credentials_dir.glob("*.enc"):
-                service = file.stem  # filename without extension
-                services.append(service)
-            
-            return services
+            # scandir's d_type answers is_file() without a stat per entry
+            with os.scandir(self.credentials_dir) as it:
+                return [
+                    entry.name[:-4]  # filename without extension
+                    for entry in it
+                    if entry.name.endswith(".enc") and entry.is_file(follow_symlinks=False)
+                ]
             
         except Exception as e:
             logger.error(f"Failed to list credentials: {e}")
             return []
 
 
-# Singleton instance
+# Singleton instance (creation is locked so racing threads build only one)
 _credential_store: Optional[CredentialStore] = None
+_credential_store_lock = threading.Lock()
 
 
 def get_credential_store() -> CredentialStore:
     """Get singleton credential store instance"""
     global _credential_store
     if _credential_store is None:
-        _credential_store = CredentialStore()
+        with _credential_store_lock:
+            if _credential_store is None:
+                _credential_store = CredentialStore()
     return _credential_store
 
 
@@ -6,21 +6,27 @@ From Gmail Module SRS Section 6.1.
 """
 
 import os
+import json
+import hashlib
 import logging
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from datetime import datetime, timedelta
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+# The Google client libraries (googleapiclient especially) are slow to
+# import, so they are loaded where they are first needed
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
 
 from haitham_voice_agent.config import Config
 from .credentials_store import get_credential_store
 
 logger = logging.getLogger(__name__)
 
+# Cached credentials are refreshed once they are this close to expiry
+_EXPIRY_MARGIN = timedelta(seconds=60)
+
 
 class OAuthFlow:
     """
@@ -38,10 +44,17 @@ class OAuthFlow:
     def __init__(self):
         self.credential_store = get_credential_store()
         self.client_secret_path = Config.CREDENTIALS_DIR / "client_secret.json"
+        self._client_config: Optional[dict] = None
+        self._cached_creds: Optional["Credentials"] = None
+        self._last_saved_hash: Optional[bytes] = None
+        self._service_cache: Optional[tuple] = None
+        
+        # Decrypt all stored credentials in one pass; later lookups hit the cache
+        self.credential_store.retrieve_all()
         
         logger.info("OAuthFlow initialized")
     
-    def get_credentials(self) -> Optional[Credentials]:
+    def get_credentials(self) -> Optional["Credentials"]:
         """
         Get valid OAuth credentials
         
@@ -54,6 +67,25 @@ class OAuthFlow:
             Credentials: Valid OAuth credentials or None
         """
         try:
+            from google.auth.transport.requests import Request
+            from google.oauth2.credentials import Credentials
+            
+            # Reuse the credentials from the last call until they near expiry
+            # (stored tokens carry no expiry; those stay cached until revoked)
+            creds = self._cached_creds
+            if creds is not None:
+                if creds.expiry is None or creds.expiry - datetime.utcnow() > _EXPIRY_MARGIN:
+                    return creds
+                
+                if creds.refresh_token:
+                    logger.info("Token about to expire, refreshing...")
+                    creds.refresh(Request())
+                    self._save_credentials(creds)
+                    logger.info("Token refreshed successfully")
+                    return creds
+                
+                self._cached_creds = None
+            
             # Try to retrieve existing credentials
             cred_data = self.credential_store.retrieve_credential("gmail_oauth")
             
@@ -80,6 +112,7 @@ class OAuthFlow:
                 elif creds.valid:
                     logger.debug("Using existing valid credentials")
                 
+                self._cached_creds = creds
                 return creds
             
             else:
@@ -91,7 +124,7 @@ class OAuthFlow:
             logger.error(f"Failed to get credentials: {e}")
             return None
     
-    def authorize(self) -> Optional[Credentials]:
+    def authorize(self) -> Optional["Credentials"]:
         """
         Initiate OAuth 2.0 authorization flow
         
@@ -102,15 +135,18 @@ class OAuthFlow:
         """
         try:
             # Check if client_secret.json exists
-            if not self.client_secret_path.exists():
+            client_config = self._get_client_config()
+            if client_config is None:
                 logger.error(f"client_secret.json not found at: {self.client_secret_path}")
                 logger.error("Please download OAuth 2.0 credentials from Google Cloud Console")
                 logger.error(f"and place them at: {self.client_secret_path}")
                 return None
             
-            # Create flow
-            flow = InstalledAppFlow.from_client_secrets_file(
-                str(self.client_secret_path),
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            
+            # Create flow (fresh each time: a flow carries per-attempt PKCE state)
+            flow = InstalledAppFlow.from_client_config(
+                client_config,
                 scopes=self.SCOPES
             )
             
@@ -127,6 +163,7 @@ class OAuthFlow:
             
             # Save credentials
             self._save_credentials(creds)
+            self._cached_creds = creds
             
             logger.info("Authorization successful")
             return creds
@@ -135,7 +172,16 @@ class OAuthFlow:
             logger.error(f"Authorization failed: {e}")
             return None
     
-    def _save_credentials(self, creds: Credentials) -> bool:
+    def _get_client_config(self) -> Optional[dict]:
+        """
+        Parsed client_secret.json, read once. A missing file is not
+        remembered, so it can be added without restarting.
+        """
+        if self._client_config is None and self.client_secret_path.is_file():
+            self._client_config = json.loads(self.client_secret_path.read_text())
+        return self._client_config
+    
+    def _save_credentials(self, creds: "Credentials") -> bool:
         """
         Save credentials to encrypted store
         
@@ -156,10 +202,19 @@ class OAuthFlow:
                 "scopes": creds.scopes
             }
             
+            # A refresh can hand back the same token: skip re-encrypting and rewriting it
+            digest = hashlib.blake2b(
+                json.dumps(cred_data, sort_keys=True).encode(), digest_size=16
+            ).digest()
+            if digest == self._last_saved_hash and self.credential_store.has_credential("gmail_oauth"):
+                logger.debug("Credentials unchanged, not saving")
+                return True
+            
             # Store encrypted
             success = self.credential_store.store_credential("gmail_oauth", cred_data)
             
             if success:
+                self._last_saved_hash = digest
                 logger.debug("Credentials saved successfully")
             
             return success
@@ -176,6 +231,10 @@ class OAuthFlow:
             bool: Success status
         """
         try:
+            self._cached_creds = None
+            self._last_saved_hash = None
+            self._service_cache = None
+            
             # Delete from store
             success = self.credential_store.delete_credential("gmail_oauth")
             
@@ -211,8 +270,22 @@ class OAuthFlow:
                 logger.error("No valid credentials available")
                 return None
             
-            # Build Gmail API service
-            service = build('gmail', 'v1', credentials=creds)
+            # Building parses the whole discovery document: reuse the service
+            # while the credentials object is the same (a new one rebuilds it)
+            cached = self._service_cache
+            if cached is not None and cached[0] is creds:
+                return cached[1]
+            
+            from googleapiclient.discovery import build
+            
+            # Build Gmail API service (bundled discovery document, no fetch)
+            service = build(
+                'gmail', 'v1',
+                credentials=creds,
+                cache_discovery=False,
+                static_discovery=True
+            )
+            self._service_cache = (creds, service)
             
             logger.debug("Gmail API service built successfully")
             return service
@@ -222,15 +295,18 @@ class OAuthFlow:
             return None
 
 
-# Singleton instance
+# Singleton instance (may be created from a preload thread)
 _oauth_flow: Optional[OAuthFlow] = None
+_oauth_flow_lock = threading.Lock()
 
 
 def get_oauth_flow() -> OAuthFlow:
     """Get singleton OAuth flow instance"""
     global _oauth_flow
     if _oauth_flow is None:
-        _oauth_flow = OAuthFlow()
+        with _oauth_flow_lock:
+            if _oauth_flow is None:
+                _oauth_flow = OAuthFlow()
     return _oauth_flow
 
 
@@ -7,6 +7,7 @@ From Gmail Module SRS Section 3.3.
 """
 
 import logging
+from functools import partial
 from typing import Dict, Any, Optional, List
 from enum import Enum
 
@@ -119,12 +120,13 @@ class ConnectionManager:
     
     # ==================== EMAIL OPERATIONS ====================
     
-    async def fetch_latest_email(self, limit: int = 10) -> Dict[str, Any]:
+    async def fetch_latest_email(self, limit: int = 10, detail: str = "full") -> Dict[str, Any]:
         """
         Fetch latest emails (API with IMAP fallback)
         
         Args:
             limit: Number of emails to fetch
+            detail: "full" or "metadata" (API only; IMAP always returns full)
             
         Returns:
             dict: Email list
@@ -132,7 +134,7 @@ class ConnectionManager:
         logger.info(f"Fetching latest {limit} emails...")
         
         result = await self._try_api_with_fallback(
-            self.gmail_api.fetch_latest_email,
+            partial(self.gmail_api.fetch_latest_email, detail=detail),
             self.imap.fetch_latest_email,
             limit=limit
         )
@@ -332,6 +334,25 @@ class ConnectionManager:
                 "suggestion": "Use Gmail API"
             }
     
+    async def mark_as_read_bulk(self, email_ids: List[str]) -> Dict[str, Any]:
+        """
+        Mark several emails as read in one request (API only)
+        
+        Args:
+            email_ids: Email IDs
+            
+        Returns:
+            dict: Status
+        """
+        if self._check_api_availability():
+            return await self.gmail_api.mark_as_read_bulk(email_ids)
+        else:
+            return {
+                "error": True,
+                "message": "Mark as read not supported via IMAP",
+                "suggestion": "Use Gmail API"
+            }
+    
     async def list_labels(self) -> Dict[str, Any]:
         """
         List Gmail labels (API only)
@@ -6,12 +6,17 @@ From Gmail Module SRS Sections 3.3, 4.1-4.6.
 """
 
 import base64
+import asyncio
 import logging
+import threading
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.utils import parsedate_to_datetime
 import time
+import weakref
+from collections import OrderedDict
 
 from googleapiclient.errors import HttpError
 
@@ -27,6 +32,70 @@ from ...config import Config
 
 logger = logging.getLogger(__name__)
 
+def _per_loop(primitives: "weakref.WeakKeyDictionary", factory):
+    """
+    The asyncio primitive for the running event loop, created on first use.
+    The handler outlives any one loop (the dispatcher runs each action on a
+    fresh one), and a Lock or Semaphore used across loops raises RuntimeError
+    """
+    loop = asyncio.get_running_loop()
+    primitive = primitives.get(loop)
+    if primitive is None:
+        primitive = primitives[loop] = factory()
+    return primitive
+
+
+class AsyncTokenBucket:
+    """
+    Token-bucket rate limiter for coroutines: refills `rate` tokens per
+    second up to `capacity`, and waiters sleep with asyncio instead of
+    blocking the event loop
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._locks = weakref.WeakKeyDictionary()
+    
+    async def acquire(self, cost: float = 1) -> None:
+        """Wait until `cost` tokens are available and take them"""
+        async with _per_loop(self._locks, asyncio.Lock):
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((cost - self.tokens) / self.rate)
+
+
+# Headers requested for format='metadata' fetches (everything _parse_message reads)
+_METADATA_HEADERS = ['From', 'To', 'Cc', 'Bcc', 'Subject', 'Date']
+
+# Seconds between sweeps of expired cache entries, and the age past which an
+# entry is expired for every TTL family the handler uses
+_CACHE_SWEEP_INTERVAL = 60
+_CACHE_MAX_TTL = max(
+    Config.EMAIL_CACHE_TTL,
+    Config.SEARCH_CACHE_TTL,
+    Config.LABELS_CACHE_TTL,
+    Config.DRAFTS_CACHE_TTL
+)
+
+# Cached in place of a message the API failed to return, so repeated requests
+# for a bad ID stop hitting the API for _NEGATIVE_CACHE_TTL seconds
+_NEGATIVE = object()
+_NEGATIVE_CACHE_TTL = 30
+
+# Messages fetched per batch request (Gmail allows 100; above 50 it starts rate limiting)
+_BATCH_SIZE = 50
+
+# IDs per messages.batchModify call (the API maximum)
+_BATCH_MODIFY_SIZE = 1000
+
 
 class GmailAPIHandler:
     """
@@ -43,9 +112,24 @@ class GmailAPIHandler:
     def __init__(self):
         self.oauth_flow = get_oauth_flow()
         self.service = None
-        self.cache = {}  # Simple in-memory cache
-        self.last_request_time = 0
-        self.rate_limit_delay = 1.0 / Config.GMAIL_API_RATE_LIMIT  # seconds between requests
+        # LRU cache of (cached_time, value); TTL is checked per read, and
+        # _set_cached evicts past GMAIL_CACHE_MAX and sweeps expired entries
+        self.cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._last_sweep = time.time()
+        # Rate limiting: GMAIL_API_RATE_LIMIT requests per second, bursts of up to one second's worth
+        self._bucket = AsyncTokenBucket(Config.GMAIL_API_RATE_LIMIT, Config.GMAIL_API_RATE_LIMIT)
+        
+        # Blocking API calls run on worker threads, a bounded number at a time;
+        # httplib2 connections are not thread-safe, so each thread gets its own
+        # (one semaphore per event loop, see _per_loop)
+        self._concurrency_sems = weakref.WeakKeyDictionary()
+        self._thread_local = threading.local()
+        
+        # Single-message fetches in flight, so concurrent callers share one request
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Mailbox historyId each cached latest_* result was fetched at
+        self._history_ids: Dict[str, str] = {}
         
         logger.info("GmailAPIHandler initialized")
     
@@ -61,12 +145,27 @@ class GmailAPIHandler:
         
         return self.service is not None
     
-    def _rate_limit(self):
-        """Apply rate limiting"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - elapsed)
-        self.last_request_time = time.time()
+    def _thread_http(self):
+        """Authorized HTTP connection owned by the calling worker thread"""
+        creds = self.oauth_flow.get_credentials()
+        local = self._thread_local
+        if getattr(local, "creds", None) is not creds:
+            import httplib2
+            import google_auth_httplib2
+            local.http = google_auth_httplib2.AuthorizedHttp(
+                creds, http=httplib2.Http(timeout=Config.GMAIL_API_TIMEOUT)
+            )
+            local.creds = creds
+        return local.http
+    
+    async def _execute(self, request) -> Any:
+        """Execute an API (or batch) request on a worker thread"""
+        sem = _per_loop(
+            self._concurrency_sems,
+            lambda: asyncio.Semaphore(Config.GMAIL_MAX_CONCURRENT)
+        )
+        async with sem:
+            return await asyncio.to_thread(lambda: request.execute(http=self._thread_http()))
     
     def _get_cached(self, key: str, ttl: int) -> Optional[Any]:
         """
@@ -83,20 +182,47 @@ class GmailAPIHandler:
             cached_time, value = self.cache[key]
             if time.time() - cached_time < ttl:
                 logger.debug(f"Cache hit: {key}")
+                self.cache.move_to_end(key)
                 return value
+            del self.cache[key]
         
         return None
     
+    def _get_cached_with_negative(self, key: str, ttl: int) -> Optional[Any]:
+        """
+        Like _get_cached, but may also return _NEGATIVE for a recent failure
+        (negative entries expire after _NEGATIVE_CACHE_TTL instead of ttl)
+        """
+        entry = self.cache.get(key)
+        if entry is not None and entry[1] is _NEGATIVE:
+            if time.time() - entry[0] < _NEGATIVE_CACHE_TTL:
+                return _NEGATIVE
+            del self.cache[key]
+            return None
+        return self._get_cached(key, ttl)
+    
     def _set_cached(self, key: str, value: Any):
-        """Set cached value"""
-        self.cache[key] = (time.time(), value)
+        """Set cached value, evicting the least recently used past GMAIL_CACHE_MAX"""
+        now = time.time()
+        self.cache[key] = (now, value)
+        self.cache.move_to_end(key)
+        while len(self.cache) > Config.GMAIL_CACHE_MAX:
+            self.cache.popitem(last=False)
+        
+        if now - self._last_sweep >= _CACHE_SWEEP_INTERVAL:
+            self._last_sweep = now
+            expired = [k for k, (cached_time, _) in self.cache.items() if now - cached_time >= _CACHE_MAX_TTL]
+            for k in expired:
+                del self.cache[k]
     
-    async def fetch_latest_email(self, limit: int = 10) -> Dict[str, Any]:
+    async def fetch_latest_email(self, limit: int = 10, detail: str = "full") -> Dict[str, Any]:
         """
         Fetch latest emails
         
         Args:
             limit: Number of emails to fetch
+            detail: "full" (with bodies) or "metadata" (headers, labels and
+                snippet only - much smaller responses)
             
         Returns:
             dict: Email list with metadata
@@ -105,40 +231,49 @@ class GmailAPIHandler:
             if not self._ensure_service():
                 return {"error": True, "message": "Gmail API service not available"}
             
-            # Check cache
-            cache_key = f"latest_{limit}"
+            # Check cache; once it expires, keep it if the inbox has not changed since
+            cache_key = f"latest_{limit}_{detail}"
+            entry = self.cache.get(cache_key)
             cached = self._get_cached(cache_key, Config.EMAIL_CACHE_TTL)
             if cached:
                 return cached
+            if entry is not None and await self._inbox_unchanged(cache_key):
+                self._set_cached(cache_key, entry[1])
+                return entry[1]
             
-            # Rate limit
-            self._rate_limit()
+            # Rate limit (profile + list)
+            await self._bucket.acquire(2)
             
             # Fetch messages
             logger.info(f"Fetching latest {limit} emails...")
             
-            results = self.service.users().messages().list(
+            # Read the historyId first, so changes made during the fetch show up next time
+            # (read concurrently, a change landing just after the list could be missed)
+            profile = await self._execute(self.service.users().getProfile(userId='me'))
+            
+            results = await self._execute(self.service.users().messages().list(
                 userId='me',
                 maxResults=limit,
                 labelIds=['INBOX']
-            ).execute()
+            ))
             
             messages = results.get('messages', [])
             
             # Fetch full message details
-            emails = []
-            for msg in messages:
-                email = await self._get_message_details(msg['id'])
-                if email:
-                    emails.append(email)
+            emails = await self._batch_get_messages([msg['id'] for msg in messages], detail)
             
             result = {
-                "emails": [email.to_dict() for email in emails],
+                "emails": emails,
                 "count": len(emails)
             }
             
             # Cache result
             self._set_cached(cache_key, result)
+            # Only a complete result may be revalidated; a short one must be refetched
+            if len(emails) == len(messages):
+                self._history_ids[cache_key] = profile['historyId']
+            else:
+                self._history_ids.pop(cache_key, None)
             
             logger.info(f"Fetched {len(emails)} emails")
             return result
@@ -154,7 +289,43 @@ class GmailAPIHandler:
             logger.error(f"Failed to fetch emails: {e}")
             return {"error": True, "message": str(e)}
     
-    async def _get_message_details(self, message_id: str) -> Optional[EmailMessage]:
+    async def _inbox_unchanged(self, cache_key: str) -> bool:
+        """
+        Check the mailbox history since a latest_* result was fetched.
+        Returns True if the inbox has no changes (the result is still valid);
+        otherwise drops the cached copies of changed messages and returns False.
+        """
+        start_history_id = self._history_ids.get(cache_key)
+        if start_history_id is None:
+            return False
+        
+        try:
+            await self._bucket.acquire()
+            response = await self._execute(self.service.users().history().list(
+                userId='me',
+                startHistoryId=start_history_id,
+                labelId='INBOX',
+                historyTypes=['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+            ))
+        except Exception as e:
+            # e.g. 404 once the historyId is too old; fall back to a full fetch
+            logger.debug(f"History check failed, refetching: {e}")
+            return False
+        
+        history = response.get('history', [])
+        if not history:
+            self._history_ids[cache_key] = response.get('historyId', start_history_id)
+            logger.debug(f"Inbox unchanged, reusing {cache_key}")
+            return True
+        
+        # Unchanged messages stay cached, so the refetch only downloads the changed ones
+        for record in history:
+            for message in record.get('messages', []):
+                self.cache.pop(f"msg_{message['id']}", None)
+                self.cache.pop(f"msg_meta_{message['id']}", None)
+        return False
+    
+    async def _get_message_details(self, message_id: str) -> Optional[Dict[str, Any]]:
         """
         Get full message details
         
@@ -162,27 +333,37 @@ class GmailAPIHandler:
             message_id: Message ID
             
         Returns:
-            EmailMessage: Email object or None
+            dict: Serialized email (EmailMessage.to_dict()) or None
         """
+        # Check cache
+        cache_key = f"msg_{message_id}"
+        cached = self._get_cached_with_negative(cache_key, Config.EMAIL_CACHE_TTL)
+        if cached is _NEGATIVE:
+            return None
+        if cached:
+            return cached
+        
+        # Join a fetch of the same message that is already running
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        email = None
         try:
-            # Check cache
-            cache_key = f"msg_{message_id}"
-            cached = self._get_cached(cache_key, Config.EMAIL_CACHE_TTL)
-            if cached:
-                return cached
-            
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             # Fetch message
-            message = self.service.users().messages().get(
+            message = await self._execute(self.service.users().messages().get(
                 userId='me',
                 id=message_id,
                 format='full'
-            ).execute()
+            ))
             
-            # Parse message
-            email = self._parse_message(message)
+            # Parse message (base64 and HTML decoding are CPU-bound, keep them off the event loop)
+            email = await asyncio.to_thread(self._serialize_message, message)
             
             # Cache
             self._set_cached(cache_key, email)
@@ -191,7 +372,107 @@ class GmailAPIHandler:
             
         except Exception as e:
             logger.error(f"Failed to get message {message_id}: {e}")
+            self._set_cached(cache_key, _NEGATIVE)
             return None
+        finally:
+            del self._inflight[cache_key]
+            future.set_result(email)
+    
+    async def _batch_get_messages(self, message_ids: List[str], detail: str = "full") -> List[Dict[str, Any]]:
+        """
+        Get details for several messages, fetching the uncached ones
+        through batch requests (one round trip per _BATCH_SIZE messages)
+        
+        Args:
+            message_ids: Message IDs
+            detail: "full" or "metadata"
+            
+        Returns:
+            list: Serialized emails in message_ids order (failed ones left out)
+            
+        Raises:
+            Exception: The first error of a batch request that failed as a whole,
+                after whatever the other batches returned has been cached
+        """
+        metadata = detail == "metadata"
+        prefix = "msg_meta_" if metadata else "msg_"
+        
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for message_id in dict.fromkeys(message_ids):
+            cached = self._get_cached_with_negative(f"msg_{message_id}", Config.EMAIL_CACHE_TTL)
+            if cached is _NEGATIVE:
+                continue
+            if not cached and metadata:
+                # A cached full message covers metadata; not the other way round
+                cached = self._get_cached(f"msg_meta_{message_id}", Config.EMAIL_CACHE_TTL)
+            if cached:
+                found[message_id] = cached
+            else:
+                missing.append(message_id)
+        
+        # Runs on the worker thread executing the batch, so parsing stays off
+        # the event loop; the cache is only touched back on the loop below
+        failed = []
+        
+        def on_response(request_id: str, response: Dict[str, Any], exception: Exception):
+            if exception is not None:
+                logger.error(f"Failed to get message {request_id}: {exception}")
+                failed.append(request_id)
+                return
+            try:
+                found[request_id] = self._serialize_message(response)
+            except Exception as e:
+                logger.error(f"Failed to parse message {request_id}: {e}")
+                failed.append(request_id)
+        
+        batches = []
+        for start in range(0, len(missing), _BATCH_SIZE):
+            # One rate-limit slot per batch
+            await self._bucket.acquire()
+            
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for message_id in missing[start:start + _BATCH_SIZE]:
+                if metadata:
+                    request = self.service.users().messages().get(
+                        userId='me',
+                        id=message_id,
+                        format='metadata',
+                        metadataHeaders=_METADATA_HEADERS
+                    )
+                else:
+                    request = self.service.users().messages().get(
+                        userId='me',
+                        id=message_id,
+                        format='full'
+                    )
+                batch.add(request, request_id=message_id)
+            batches.append(batch)
+        
+        # Batches run concurrently (bounded by the semaphore)
+        results = await asyncio.gather(*(self._execute(batch) for batch in batches), return_exceptions=True)
+        batch_errors = [result for result in results if isinstance(result, Exception)]
+        for error in batch_errors:
+            logger.error(f"Batch request failed: {error}")
+        
+        for message_id in missing:
+            if message_id in found:
+                self._set_cached(f"{prefix}{message_id}", found[message_id])
+        for message_id in failed:
+            self._set_cached(f"msg_{message_id}", _NEGATIVE)
+        
+        # A short list would otherwise be cached as the complete result
+        if batch_errors:
+            raise batch_errors[0]
+        
+        return [found[message_id] for message_id in message_ids if message_id in found]
+    
+    def _serialize_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parse a Gmail API message straight to its to_dict() form; this is
+        what gets cached, so cache hits are never re-serialized
+        """
+        return self._parse_message(message).to_dict()
     
     def _parse_message(self, message: Dict[str, Any]) -> EmailMessage:
         """
@@ -203,32 +484,50 @@ class GmailAPIHandler:
         Returns:
             EmailMessage: Parsed email
         """
+        payload = message['payload']
+        
         # Extract headers
-        headers = {}
-        for header in message['payload'].get('headers', []):
-            headers[header['name'].lower()] = header['value']
+        headers = {h['name'].lower(): h['value'] for h in payload.get('headers', ())}
         
         # Parse date
         date_str = headers.get('date', '')
         try:
-            from email.utils import parsedate_to_datetime
             date = parsedate_to_datetime(date_str)
         except:
             date = datetime.now()
         
-        # Extract body
+        # Extract body and attachments in one walk over the MIME tree
+        # (explicit stack, so multipart/alternative inside multipart/mixed is reached)
         body_text = ""
         body_html = None
+        has_attachments = False
+        attachments = []
         
-        if 'parts' in message['payload']:
-            for part in message['payload']['parts']:
-                if part['mimeType'] == 'text/plain':
-                    body_text = self._decode_body(part['body'].get('data', ''))
-                elif part['mimeType'] == 'text/html':
-                    body_html = self._decode_body(part['body'].get('data', ''))
-        else:
-            body_data = message['payload']['body'].get('data', '')
-            if message['payload']['mimeType'] == 'text/html':
+        if 'parts' in payload:
+            stack = list(reversed(payload['parts']))
+            while stack:
+                part = stack.pop()
+                if 'parts' in part:
+                    stack.extend(reversed(part['parts']))
+                    continue
+                mime_type = part.get('mimeType', '')
+                filename = part.get('filename')
+                body = part.get('body', {})
+                if filename:
+                    has_attachments = True
+                    attachments.append(Attachment(
+                        filename=filename,
+                        mime_type=mime_type,
+                        size=body.get('size', 0),
+                        attachment_id=body.get('attachmentId')
+                    ))
+                elif mime_type == 'text/plain' and not body_text:
+                    body_text = self._decode_body(body.get('data', ''))
+                elif mime_type == 'text/html' and body_html is None:
+                    body_html = self._decode_body(body.get('data', ''))
+        elif 'body' in payload:  # absent in format='metadata' responses
+            body_data = payload['body'].get('data', '')
+            if payload['mimeType'] == 'text/html':
                 body_html = self._decode_body(body_data)
                 body_text = extract_plain_text_from_html(body_html)
             else:
@@ -243,26 +542,12 @@ class GmailAPIHandler:
         
         # Parse labels
         labels = message.get('labelIds', [])
+        label_set = frozenset(labels)
         
         # Check flags
-        is_unread = 'UNREAD' in labels
-        is_starred = 'STARRED' in labels
-        is_important = 'IMPORTANT' in labels
-        
-        # Parse attachments
-        has_attachments = False
-        attachments = []
-        
-        if 'parts' in message['payload']:
-            for part in message['payload']['parts']:
-                if part.get('filename'):
-                    has_attachments = True
-                    attachments.append(Attachment(
-                        filename=part['filename'],
-                        mime_type=part['mimeType'],
-                        size=part['body'].get('size', 0),
-                        attachment_id=part['body'].get('attachmentId')
-                    ))
+        is_unread = 'UNREAD' in label_set
+        is_starred = 'STARRED' in label_set
+        is_important = 'IMPORTANT' in label_set
         
         # Create EmailMessage
         email = EmailMessage(
@@ -328,29 +613,25 @@ class GmailAPIHandler:
                 return cached
             
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             logger.info(f"Searching emails: {query}")
             
             # Search
-            results = self.service.users().messages().list(
+            results = await self._execute(self.service.users().messages().list(
                 userId='me',
                 q=query,
                 maxResults=limit
-            ).execute()
+            ))
             
             messages = results.get('messages', [])
             
             # Fetch details
-            emails = []
-            for msg in messages:
-                email = await self._get_message_details(msg['id'])
-                if email:
-                    emails.append(email)
+            emails = await self._batch_get_messages([msg['id'] for msg in messages])
             
             result = {
                 "query": query,
-                "emails": [email.to_dict() for email in emails],
+                "emails": emails,
                 "count": len(emails)
             }
             
@@ -381,7 +662,7 @@ class GmailAPIHandler:
             email = await self._get_message_details(email_id)
             
             if email:
-                return email.to_dict()
+                return email
             else:
                 return {"error": True, "message": f"Email not found: {email_id}"}
                 
@@ -430,15 +711,15 @@ class GmailAPIHandler:
             raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
             
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             # Create draft
             logger.info(f"Creating draft: {subject}")
             
-            draft = self.service.users().drafts().create(
+            draft = await self._execute(self.service.users().drafts().create(
                 userId='me',
                 body={'message': {'raw': raw}}
-            ).execute()
+            ))
             
             logger.info(f"Draft created: {draft['id']}")
             
@@ -477,15 +758,15 @@ class GmailAPIHandler:
                 return cached
             
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             logger.info("Listing drafts...")
             
             # List drafts
-            results = self.service.users().drafts().list(
+            results = await self._execute(self.service.users().drafts().list(
                 userId='me',
                 maxResults=limit
-            ).execute()
+            ))
             
             drafts = results.get('drafts', [])
             
@@ -528,15 +809,15 @@ class GmailAPIHandler:
                 return {"error": True, "message": "Gmail API service not available"}
             
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             logger.info(f"Deleting draft: {draft_id}")
             
             # Delete
-            self.service.users().drafts().delete(
+            await self._execute(self.service.users().drafts().delete(
                 userId='me',
                 id=draft_id
-            ).execute()
+            ))
             
             logger.info(f"Draft deleted: {draft_id}")
             
@@ -576,15 +857,15 @@ class GmailAPIHandler:
                 return {"error": True, "message": "Gmail API service not available"}
             
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             logger.warning(f"Sending draft: {draft_id} (CONFIRMED)")
             
             # Send
-            sent = self.service.users().drafts().send(
+            sent = await self._execute(self.service.users().drafts().send(
                 userId='me',
                 body={'id': draft_id}
-            ).execute()
+            ))
             
             logger.info(f"Draft sent: {draft_id}")
             
@@ -618,16 +899,16 @@ class GmailAPIHandler:
                 return {"error": True, "message": "Gmail API service not available"}
             
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             logger.info(f"Marking as read: {email_id}")
             
             # Remove UNREAD label
-            self.service.users().messages().modify(
+            await self._execute(self.service.users().messages().modify(
                 userId='me',
                 id=email_id,
                 body={'removeLabelIds': ['UNREAD']}
-            ).execute()
+            ))
             
             return {
                 "status": "marked_read",
@@ -641,6 +922,48 @@ class GmailAPIHandler:
             logger.error(f"Failed to mark as read: {e}")
             return {"error": True, "message": str(e)}
     
+    async def mark_as_read_bulk(self, email_ids: List[str]) -> Dict[str, Any]:
+        """
+        Mark several emails as read with batchModify (one call per _BATCH_MODIFY_SIZE IDs)
+        
+        Args:
+            email_ids: Email IDs
+            
+        Returns:
+            dict: Status
+        """
+        try:
+            if not self._ensure_service():
+                return {"error": True, "message": "Gmail API service not available"}
+            
+            email_ids = list(dict.fromkeys(email_ids))
+            logger.info(f"Marking {len(email_ids)} emails as read")
+            
+            for start in range(0, len(email_ids), _BATCH_MODIFY_SIZE):
+                # Rate limit
+                await self._bucket.acquire()
+                
+                await self._execute(self.service.users().messages().batchModify(
+                    userId='me',
+                    body={
+                        'ids': email_ids[start:start + _BATCH_MODIFY_SIZE],
+                        'removeLabelIds': ['UNREAD']
+                    }
+                ))
+            
+            return {
+                "status": "marked_read",
+                "email_ids": email_ids,
+                "count": len(email_ids)
+            }
+            
+        except HttpError as e:
+            logger.error(f"Failed to mark as read: {e}")
+            return {"error": True, "message": f"Failed to mark as read: {e.status_code}"}
+        except Exception as e:
+            logger.error(f"Failed to mark as read: {e}")
+            return {"error": True, "message": str(e)}
+    
     async def apply_label(self, email_id: str, label_name: str) -> Dict[str, Any]:
         """
         Apply label to email
@@ -656,29 +979,31 @@ class GmailAPIHandler:
             if not self._ensure_service():
                 return {"error": True, "message": "Gmail API service not available"}
             
-            # Get label ID
-            labels = await self.list_labels()
-            label_id = None
-            
-            for label in labels.get('labels', []):
-                if label['name'].lower() == label_name.lower():
-                    label_id = label['id']
-                    break
+            # Get label ID from the name -> ID index, rebuilt from list_labels
+            # (cached or fresh) whenever the index itself is missing
+            index = self._get_cached("label_index", Config.LABELS_CACHE_TTL)
+            if index is None:
+                labels = await self.list_labels()
+                if labels.get("error"):
+                    return labels
+                index = {label['name'].lower(): label['id'] for label in labels['labels']}
+                self._set_cached("label_index", index)
+            label_id = index.get(label_name.lower())
             
             if not label_id:
                 return {"error": True, "message": f"Label not found: {label_name}"}
             
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             logger.info(f"Applying label '{label_name}' to {email_id}")
             
             # Apply label
-            self.service.users().messages().modify(
+            await self._execute(self.service.users().messages().modify(
                 userId='me',
                 id=email_id,
                 body={'addLabelIds': [label_id]}
-            ).execute()
+            ))
             
             return {
                 "status": "label_applied",
@@ -711,12 +1036,12 @@ class GmailAPIHandler:
                 return cached
             
             # Rate limit
-            self._rate_limit()
+            await self._bucket.acquire()
             
             logger.info("Listing labels...")
             
             # List labels
-            results = self.service.users().labels().list(userId='me').execute()
+            results = await self._execute(self.service.users().labels().list(userId='me'))
             labels = results.get('labels', [])
             
             result = {
@@ -103,8 +103,8 @@ class NotificationManager:
     async def check_gmail(self):
         """Check for new important emails"""
         try:
-            # Fetch latest 1 email
-            res = await self.gmail.fetch_latest_email(limit=1)
+            # Fetch latest 1 email (headers are enough for the notification)
+            res = await self.gmail.fetch_latest_email(limit=1, detail="metadata")
             
             if res.get("error") or res.get("count", 0) == 0:
                 return